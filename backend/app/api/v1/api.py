@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import auth, users, profiles, reels, logs, dashboard, analytics
+from app.api.v1.endpoints import auth, users, profiles, reels, logs, dashboard, analytics, media
 
 api_router = APIRouter()
 
@@ -10,3 +10,4 @@ api_router.include_router(reels.router, prefix="/reels", tags=["posted-reels"])
 api_router.include_router(logs.router, prefix="/logs", tags=["application-logs"])
 api_router.include_router(dashboard.router, prefix="/dashboard", tags=["dashboard"])
 api_router.include_router(analytics.router, prefix="/analytics", tags=["analytics"])
+api_router.include_router(media.router, prefix="/media", tags=["media"])
@@ -3,9 +3,12 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, and_
 from datetime import datetime, timedelta
 from app.core.database import get_db_session
+from app.core.security import get_current_user
+from app.models.user import User
 from app.models.posted_reel import PostedReel
 from app.models.monitored_profile import MonitoredProfile
 from app.models.application_log import ApplicationLog
+from app.services.fair_dispatch import fair_dispatch
 import structlog
 
 logger = structlog.get_logger()
@@ -158,3 +161,15 @@ async def get_top_performing_reels(db: AsyncSession = Depends(get_db_session)):
     except Exception as e:
         logger.error("Error getting top performing reels", error=str(e))
         return {"top_reels": []}
+
+@router.get("/queues")
+async def get_queue_stats(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db_session)
+):
+    """The current user's queue depth and oldest wait for monitoring and posting"""
+    try:
+        return {"tenants": await fair_dispatch.queue_stats(db, current_user.id)}
+    except Exception as e:
+        logger.error("Error getting queue stats", error=str(e))
+        return {"tenants": []}
@@ -0,0 +1,94 @@
+import asyncio
+import os
+import re
+from typing import Optional, Tuple
+from fastapi import APIRouter, Header, HTTPException, Query, status
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from app.services.media_service import media_service
+from app.services.video_store import video_store
+
+router = APIRouter()
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+READ_SIZE = 256 * 1024
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single ``bytes=`` range; None means serve the whole file
+
+    Raises ValueError when the range cannot be satisfied.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or (not match.group(1) and not match.group(2)):
+        # Multiple or malformed ranges: ignoring Range is allowed
+        return None
+    first, last = match.groups()
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError("Empty suffix range")
+        return max(0, size - length), size - 1
+    first = int(first)
+    last = min(int(last), size - 1) if last else size - 1
+    if first >= size or first > last:
+        raise ValueError("Range not satisfiable")
+    return first, last
+
+async def _read_range(path: str, first: int, last: int):
+    f = await asyncio.to_thread(open, path, "rb")
+    try:
+        await asyncio.to_thread(f.seek, first)
+        remaining = last - first + 1
+        while remaining > 0:
+            block = await asyncio.to_thread(f.read, min(READ_SIZE, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            yield block
+    finally:
+        await asyncio.to_thread(f.close)
+
+@router.get("/{sha256}.mp4")
+async def get_media(
+    sha256: str,
+    expires: int = Query(...),
+    signature: str = Query(...),
+    range_header: Optional[str] = Header(None, alias="Range")
+):
+    """Serve a stored video through a signed, expiring link (supports Range)"""
+    if not media_service.verify(sha256, expires, signature):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid or expired link")
+
+    path = video_store.object_path(sha256)
+    try:
+        size = os.stat(path).st_size
+    except FileNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Video not found")
+
+    headers = {"Accept-Ranges": "bytes", "Cache-Control": "private, max-age=3600"}
+
+    byte_range = None
+    if range_header:
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            return Response(
+                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                headers={"Content-Range": f"bytes */{size}", **headers}
+            )
+
+    if byte_range is None:
+        # Whole file: FileResponse lets the server use sendfile where available
+        return FileResponse(path, media_type="video/mp4", headers=headers)
+
+    first, last = byte_range
+    headers.update({
+        "Content-Range": f"bytes {first}-{last}/{size}",
+        "Content-Length": str(last - first + 1)
+    })
+    return StreamingResponse(
+        _read_range(path, first, last),
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type="video/mp4",
+        headers=headers
+    )
@@ -1,9 +1,16 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
 from app.core.database import get_db_session
+from app.core.security import get_current_user
 from app.models.monitored_profile import MonitoredProfile
 from app.models.posted_reel import PostedReel
+from app.models.user import User
+from app.schemas.monitored_profile import MonitoredProfileCreate, MonitoredProfileUpdate
+from app.services.scheduler_service import normalize_username
+from app.tasks.monitoring_tasks import monitor_profile
 import structlog
 
 logger = structlog.get_logger()
@@ -16,6 +23,7 @@ async def list_profiles(db: AsyncSession = Depends(get_db_session)):
         # Buscar todos os perfis
         result = await db.execute(
             select(MonitoredProfile)
+            .options(selectinload(MonitoredProfile.instagram_account))
             .order_by(MonitoredProfile.created_at.desc())
         )
         profiles = result.scalars().all()
@@ -28,6 +36,7 @@ async def list_profiles(db: AsyncSession = Depends(get_db_session)):
                 .where(PostedReel.profile_id == profile.id)
             )
             posts_count = posts_count_result.scalar() or 0
+            account = profile.instagram_account
             
             profiles_data.append({
                 "id": profile.id,
@@ -38,6 +47,11 @@ async def list_profiles(db: AsyncSession = Depends(get_db_session)):
                 "last_checked_at": profile.last_checked_at.isoformat() if profile.last_checked_at else None,
                 "last_posted_at": profile.last_posted_at.isoformat() if profile.last_posted_at else None,
                 "check_interval_minutes": profile.check_interval_minutes,
+                "adaptive_polling": profile.adaptive_polling,
+                "effective_interval_minutes": account.effective_interval_minutes if account else None,
+                "consecutive_failures": account.consecutive_failures if account else 0,
+                "last_error": account.last_error if account else None,
+                "quarantined_at": account.quarantined_at.isoformat() if account and account.quarantined_at else None,
                 "posts_count": posts_count,
                 "created_at": profile.created_at.isoformat()
             })
@@ -85,3 +99,67 @@ async def get_profiles_stats(db: AsyncSession = Depends(get_db_session)):
             "total_posts": 0
         }
 
+def _profile_settings(profile: MonitoredProfile) -> dict:
+    return {
+        "id": profile.id,
+        "username": profile.instagram_username,
+        "display_name": profile.display_name,
+        "is_active": profile.is_active,
+        "check_interval_minutes": profile.check_interval_minutes,
+        "adaptive_polling": profile.adaptive_polling
+    }
+
+@router.post("/", status_code=status.HTTP_201_CREATED)
+async def create_profile(
+    profile_data: MonitoredProfileCreate,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db_session)
+):
+    """Start monitoring an Instagram profile"""
+    profile = MonitoredProfile(
+        user_id=current_user.id,
+        instagram_username=normalize_username(profile_data.instagram_username),
+        display_name=profile_data.display_name,
+        check_interval_minutes=profile_data.check_interval_minutes,
+        adaptive_polling=profile_data.adaptive_polling
+    )
+    db.add(profile)
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Profile is already monitored"
+        )
+    await db.refresh(profile)
+    
+    # First check right away; it also links the profile to its shared account
+    monitor_profile.delay(profile.id)
+    
+    logger.info("Monitored profile created", user_id=current_user.id, profile_id=profile.id)
+    return _profile_settings(profile)
+
+@router.patch("/{profile_id}")
+async def update_profile(
+    profile_id: int,
+    profile_data: MonitoredProfileUpdate,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db_session)
+):
+    """Update a monitored profile's polling settings"""
+    profile = await db.get(MonitoredProfile, profile_id)
+    
+    if not profile or profile.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found"
+        )
+    
+    for field, value in profile_data.model_dump(exclude_unset=True, exclude_none=True).items():
+        setattr(profile, field, value)
+    await db.commit()
+    await db.refresh(profile)
+    
+    logger.info("Monitored profile updated", user_id=current_user.id, profile_id=profile.id)
+    return _profile_settings(profile)
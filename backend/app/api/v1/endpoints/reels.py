@@ -1,10 +1,15 @@
-from fastapi import APIRouter, Depends, Query
+from typing import List, Optional
+from fastapi import APIRouter, Body, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, and_
 from datetime import datetime, timedelta
 from app.core.database import get_db_session
+from app.core.security import get_current_user
+from app.models.user import User
 from app.models.posted_reel import PostedReel
 from app.models.monitored_profile import MonitoredProfile
+from app.services.publishing_service import publishing_service
+from app.tasks.download_tasks import enqueue_downloads
 import structlog
 
 logger = structlog.get_logger()
@@ -152,3 +157,23 @@ async def get_top_performing_reels(db: AsyncSession = Depends(get_db_session)):
         logger.error("Error getting top performing reels", error=str(e))
         return {"top_reels": []}
 
+@router.post("/dead-letter/requeue")
+async def requeue_dead_letter_reels(
+    reel_ids: Optional[List[int]] = Body(None, embed=True),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db_session)
+):
+    """Requeue the current user's dead-lettered reels (all of them, or the given ids)"""
+    requeued = await publishing_service.requeue_dead_letter(db, reel_ids, current_user.id)
+    enqueue_downloads(requeued)
+    return {"requeued": len(requeued), "reel_ids": requeued}
+
+@router.post("/dead-letter/discard")
+async def discard_dead_letter_reels(
+    reel_ids: Optional[List[int]] = Body(None, embed=True),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db_session)
+):
+    """Give up on the current user's dead-lettered reels and free their videos"""
+    discarded = await publishing_service.discard_dead_letter(db, reel_ids, current_user.id)
+    return {"discarded": len(discarded), "reel_ids": discarded}
@@ -6,7 +6,10 @@ from app.core.security import get_current_user
 from app.models.user import User
 from app.models.tiktok_credentials import TikTokCredentials
 from app.schemas.tiktok_credentials import TikTokCredentialsResponse
+from app.services.publish_scheduler import publish_scheduler
 from app.services.tiktok_service import tiktok_service
+from app.services.tiktok_token_service import tiktok_token_service, expires_at_for
+import httpx
 import structlog
 import secrets
 
@@ -66,6 +69,7 @@ async def handle_tiktok_callback(
             credentials.access_token = token_data["data"]["access_token"]
             credentials.refresh_token = token_data["data"]["refresh_token"]
             credentials.expires_in = token_data["data"]["expires_in"]
+            credentials.expires_at = expires_at_for(token_data["data"]["expires_in"])
             credentials.open_id = user_info["data"]["user"]["open_id"]
             credentials.scope = token_data["data"].get("scope", "")
         else:
@@ -75,6 +79,7 @@ async def handle_tiktok_callback(
                 access_token=token_data["data"]["access_token"],
                 refresh_token=token_data["data"]["refresh_token"],
                 expires_in=token_data["data"]["expires_in"],
+                expires_at=expires_at_for(token_data["data"]["expires_in"]),
                 open_id=user_info["data"]["user"]["open_id"],
                 scope=token_data["data"].get("scope", "")
             )
@@ -168,6 +173,7 @@ async def get_tiktok_user_info(
         )
     
     try:
+        credentials = await tiktok_token_service.ensure_valid(db, credentials)
         user_info = await tiktok_service.get_user_info(credentials.access_token)
         return user_info["data"]
     except Exception as e:
@@ -196,6 +202,7 @@ async def get_tiktok_videos(
         )
     
     try:
+        credentials = await tiktok_token_service.ensure_valid(db, credentials)
         videos = await tiktok_service.get_user_videos(credentials.access_token, max_count)
         return videos["data"]
     except Exception as e:
@@ -204,3 +211,29 @@ async def get_tiktok_videos(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Failed to get TikTok videos"
         )
+
+@router.get("/publish/quota")
+async def get_tiktok_publish_quota(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db_session)
+):
+    """Get how much of the TikTok account's posting quota is used"""
+    result = await db.execute(
+        select(TikTokCredentials).where(TikTokCredentials.user_id == current_user.id)
+    )
+    credentials = result.scalar_one_or_none()
+    
+    if not credentials:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="TikTok account not connected"
+        )
+    
+    try:
+        return await publish_scheduler.usage(credentials.open_id)
+    except Exception as e:
+        logger.error("Failed to get TikTok publish quota", error=str(e), user_id=current_user.id)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Publish quota unavailable"
+        )
@@ -17,6 +17,7 @@ celery_app = Celery(
     backend=result_backend,
     include=[
         "app.tasks.monitoring_tasks",
+        "app.tasks.download_tasks",
         "app.tasks.posting_tasks",
         "app.tasks.maintenance_tasks"
     ]
@@ -35,15 +36,39 @@ celery_app.conf.update(
     worker_prefetch_multiplier=1,
     worker_max_tasks_per_child=1000,
     result_expires=3600,  # 1 hour
+    # Downloads run on their own workers so they scale apart from posting
+    task_routes={
+        "app.tasks.download_tasks.*": {"queue": "downloads"},
+    },
     beat_schedule={
         "monitor-profiles": {
             "task": "app.tasks.monitoring_tasks.monitor_all_profiles",
+            "schedule": 60.0,  # Every minute, only due profiles are dispatched
+        },
+        "probe-quarantined-profiles": {
+            "task": "app.tasks.monitoring_tasks.probe_quarantined_profiles",
+            "schedule": 900.0,  # Every 15 minutes, only due probes run
+        },
+        "retry-stalled-downloads": {
+            "task": "app.tasks.download_tasks.retry_stalled_downloads",
             "schedule": 300.0,  # Every 5 minutes
         },
+        "post-ready-reels": {
+            "task": "app.tasks.posting_tasks.post_ready_reels",
+            "schedule": 60.0,  # Every minute, picks up reels whose posting task was lost
+        },
+        "poll-publish-status": {
+            "task": "app.tasks.posting_tasks.poll_publish_status",
+            "schedule": 30.0,  # Every 30 seconds, only due publishes are checked
+        },
         "cleanup-old-logs": {
             "task": "app.tasks.maintenance_tasks.cleanup_old_logs",
             "schedule": 86400.0,  # Daily
         },
+        "enforce-storage-budget": {
+            "task": "app.tasks.maintenance_tasks.enforce_storage_budget",
+            "schedule": 3600.0,  # Hourly
+        },
         "update-proxy-stats": {
             "task": "app.tasks.maintenance_tasks.update_proxy_statistics",
             "schedule": 3600.0,  # Hourly
@@ -0,0 +1,33 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+class LRUCache:
+    """Small thread-safe in-process LRU cache"""
+    
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+    
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def delete(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
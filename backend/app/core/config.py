@@ -31,16 +31,107 @@ class Settings(BaseSettings):
     TIKTOK_CLIENT_KEY: Optional[str] = None
     TIKTOK_CLIENT_SECRET: Optional[str] = None
     TIKTOK_REDIRECT_URI: str = "http://localhost:3000/auth/tiktok/callback"
+    TIKTOK_UPLOAD_CHUNK_SIZE: int = 10 * 1024 * 1024  # 5MB to 64MB per TikTok's limits
+    TIKTOK_UPLOAD_READ_SIZE: int = 1024 * 1024
+    TIKTOK_UPLOAD_CHUNK_RETRIES: int = 3
+    TIKTOK_HTTP2: bool = True
+    TIKTOK_HTTP_MAX_CONNECTIONS: int = 100
+    TIKTOK_HTTP_MAX_KEEPALIVE: int = 20
+    TIKTOK_HTTP_KEEPALIVE_SECONDS: float = 60.0
+    TIKTOK_HTTP_TIMEOUT_SECONDS: float = 30.0
+    TIKTOK_HTTP_UPLOAD_TIMEOUT_SECONDS: float = 120.0
+    # Tokens expiring within the window are refreshed ahead of time by the beat job
+    TIKTOK_TOKEN_REFRESH_WINDOW_SECONDS: int = 2 * 3600
+    TIKTOK_TOKEN_REFRESH_CONCURRENCY: int = 10
+    TIKTOK_TOKEN_REFRESH_BATCH_SIZE: int = 500
+    # Uploads only start with at least this much token lifetime left
+    TIKTOK_TOKEN_MIN_VALIDITY_SECONDS: int = 600
+    TIKTOK_TOKEN_DEFER_SECONDS: int = 60
+    TIKTOK_TOKEN_LOCK_SECONDS: int = 30
     
     # Instagram Scraping
+    INSTAGRAM_USERNAME: Optional[str] = None
+    INSTAGRAM_PASSWORD: Optional[str] = None
+    INSTAGRAM_CLIENT_POOL_SIZE: int = 20
+    INSTAGRAM_CLIENT_IDLE_SECONDS: int = 900
+    # Idle clients kept per account/proxy pair; defaults to MAX_CONCURRENT_SCRAPES
+    INSTAGRAM_CLIENTS_PER_KEY: Optional[int] = None
+    INSTAGRAM_SESSION_TTL_SECONDS: int = 7 * 24 * 3600
+    INSTAGRAM_USER_ID_CACHE_SIZE: int = 10000
+    INSTAGRAM_USER_ID_TTL_SECONDS: int = 30 * 24 * 3600
+    INSTAGRAM_PROXY_RATE_PER_MINUTE: int = 30
+    INSTAGRAM_PROXY_BURST: int = 5
+    INSTAGRAM_ACCOUNT_RATE_PER_MINUTE: int = 60
+    INSTAGRAM_ACCOUNT_BURST: int = 10
     PROXY_LIST_URL: Optional[str] = None
     SCRAPING_DELAY_MIN: int = 30
     SCRAPING_DELAY_MAX: int = 120
     MAX_CONCURRENT_SCRAPES: int = 5
+    SCRAPE_TIMEOUT_SECONDS: int = 60
+    REEL_DISCOVERY_PAGE_SIZE: int = 12
+    REEL_DISCOVERY_MAX_PAGES: int = 5
+    
+    # Monitoring Scheduler
+    MONITOR_MAX_DUE_PER_SWEEP: int = 1000
+    MONITOR_FANOUT_BATCH_SIZE: int = 50
+    ADAPTIVE_MIN_INTERVAL_MINUTES: int = 10
+    ADAPTIVE_MAX_INTERVAL_MINUTES: int = 720
+    ADAPTIVE_WINDOW_DAYS: int = 28
+    ADAPTIVE_TARGET_POSTS_PER_CHECK: float = 0.5
+    PROFILE_BACKOFF_MAX_MINUTES: int = 24 * 60
+    PROFILE_QUARANTINE_AFTER_FAILURES: int = 6
+    PROFILE_PROBE_INTERVAL_MINUTES: int = 6 * 60
+    PROFILE_PROBE_BATCH_SIZE: int = 50
     
     # File Storage
     UPLOAD_DIR: str = "uploads"
     MAX_FILE_SIZE: int = 100 * 1024 * 1024  # 100MB
+    VIDEO_MIN_DURATION_SECONDS: float = 1.0
+    VIDEO_MAX_DURATION_SECONDS: float = 600.0
+    VIDEO_MIN_RESOLUTION: int = 360
+    STORAGE_BUDGET_BYTES: int = 20 * 1024 * 1024 * 1024  # 20GB
+    STORAGE_LOW_WATERMARK: float = 0.9
+    STORAGE_MAX_AGE_DAYS: int = 7
+    STORAGE_STALE_INCOMING_HOURS: int = 24
+    
+    # Video Downloads
+    DOWNLOAD_CHUNK_SIZE: int = 256 * 1024
+    DOWNLOAD_WRITE_BUFFER_SIZE: int = 4 * 1024 * 1024
+    DOWNLOAD_CONNECTIONS_PER_PROXY: int = 16
+    DOWNLOAD_KEEPALIVE_SECONDS: int = 60
+    DOWNLOAD_TIMEOUT_SECONDS: int = 300
+    DOWNLOAD_MAX_ATTEMPTS: int = 3
+    DOWNLOAD_MAX_IN_FLIGHT: int = 8
+    DOWNLOAD_BATCH_SIZE: int = 20
+    DOWNLOAD_RETRY_AFTER_MINUTES: int = 10
+    DOWNLOAD_LEASE_SECONDS: int = 600
+    DOWNLOAD_SWEEP_LIMIT: int = 500
+    # Oldest queued reels per tenant considered by each fair claim
+    REEL_QUEUE_TENANT_WINDOW: int = 50
+    
+    # TikTok Publishing
+    # Public base URL of this API; TikTok must have the domain verified for PULL_FROM_URL
+    MEDIA_PUBLIC_BASE_URL: Optional[str] = None
+    MEDIA_URL_TTL_SECONDS: int = 3600
+    MEDIA_REACHABILITY_TTL_SECONDS: int = 300
+    PUBLISH_LEASE_SECONDS: int = 900
+    PUBLISH_CLAIM_BATCH_SIZE: int = 10
+    PUBLISH_MAX_IN_FLIGHT: int = 4
+    PUBLISH_MAX_ATTEMPTS: int = 5
+    # Per TikTok account pacing: rolling quota, minimum gap, fallback 429 cooldown
+    PUBLISH_QUOTA_PER_ACCOUNT: int = 15
+    PUBLISH_QUOTA_WINDOW_SECONDS: int = 24 * 3600
+    PUBLISH_MIN_SPACING_SECONDS: int = 300
+    PUBLISH_COOLDOWN_DEFAULT_SECONDS: int = 900
+    PUBLISH_RETRY_BASE_SECONDS: int = 60
+    PUBLISH_RETRY_MAX_SECONDS: int = 6 * 3600
+    PUBLISH_STATUS_INITIAL_DELAY_SECONDS: int = 30
+    PUBLISH_STATUS_MAX_DELAY_SECONDS: int = 600
+    PUBLISH_STATUS_MAX_CHECKS: int = 20
+    PUBLISH_POLL_BATCH_SIZE: int = 200
+    PUBLISH_POLL_CONCURRENCY: int = 20
+    # How long a poll holds the publishes it checks; a crashed poll's are checked again after it
+    PUBLISH_POLL_CLAIM_SECONDS: int = 600
     
     # Celery
     CELERY_BROKER_URL: str = "redis://localhost:6379/0"
@@ -0,0 +1,138 @@
+import mmap
+import os
+import struct
+from typing import Any, Dict, Iterator, Optional, Tuple
+from app.core.config import settings
+
+# Container boxes we descend into; everything else is skipped by size
+CONTAINER_BOXES = {b"moov", b"trak", b"mdia", b"minf", b"stbl"}
+VIDEO_CODECS = {"avc1", "avc3", "hvc1", "hev1", "vp09"}
+
+class Mp4Error(Exception):
+    """The file is not a readable MP4 / ISO-BMFF container"""
+
+def _boxes(data, start: int, end: int) -> Iterator[Tuple[bytes, int, int, int]]:
+    """Yield ``(type, box_start, payload_start, box_end)`` for the boxes in ``[start, end)``"""
+    offset = start
+    while offset + 8 <= end:
+        size, box_type = struct.unpack_from(">I4s", data, offset)
+        header = 8
+        if size == 1:
+            if offset + 16 > end:
+                raise Mp4Error("Truncated 64-bit box header")
+            size = struct.unpack_from(">Q", data, offset + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header or offset + size > end:
+            raise Mp4Error(f"Invalid size for box {box_type!r} at {offset}")
+        yield box_type, offset, offset + header, offset + size
+        offset += size
+
+def _parse_mvhd(data, start: int) -> Tuple[int, int]:
+    version = data[start]
+    if version == 1:
+        timescale, duration = struct.unpack_from(">IQ", data, start + 20)
+    else:
+        timescale, duration = struct.unpack_from(">II", data, start + 12)
+    return timescale, duration
+
+def _parse_trak(data, start: int, end: int) -> Dict[str, Any]:
+    track: Dict[str, Any] = {}
+    stack = [(start, end)]
+    while stack:
+        box_start, box_end = stack.pop()
+        for box_type, _, payload, child_end in _boxes(data, box_start, box_end):
+            if box_type in CONTAINER_BOXES:
+                stack.append((payload, child_end))
+            elif box_type == b"tkhd":
+                # Width and height are 16.16 fixed point, the last 8 bytes of tkhd
+                width, height = struct.unpack_from(">II", data, child_end - 8)
+                track["width"], track["height"] = width >> 16, height >> 16
+            elif box_type == b"hdlr":
+                track["handler"] = bytes(data[payload + 8:payload + 12]).decode("latin-1")
+            elif box_type == b"stsd" and child_end - payload >= 16:
+                # First sample entry: its box type is the codec four-cc
+                track["codec"] = bytes(data[payload + 12:payload + 16]).decode("latin-1")
+    return track
+
+def probe(path: str) -> Dict[str, Any]:
+    """Read container metadata from an MP4 without decoding or reading it all
+
+    The file is memory-mapped and only box headers plus ``mvhd``/``tkhd``/
+    ``hdlr``/``stsd`` are touched, so the cost does not depend on the size
+    of the media data. Returns ``size``, ``duration``, ``width``,
+    ``height``, ``video_codec``, ``audio_codec``, ``moov_offset``,
+    ``moov_size`` and ``faststart`` (moov ahead of mdat).
+    """
+    size = os.path.getsize(path)
+    if size < 8:
+        raise Mp4Error("File too small to be an MP4")
+
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        info: Dict[str, Any] = {
+            "size": size,
+            "duration": None,
+            "width": None,
+            "height": None,
+            "video_codec": None,
+            "audio_codec": None,
+            "moov_offset": None,
+            "moov_size": None,
+            "faststart": False
+        }
+        mdat_offset = None
+        seen_ftyp = False
+
+        for box_type, box_start, payload, box_end in _boxes(data, 0, size):
+            if box_type == b"ftyp":
+                seen_ftyp = True
+            elif box_type == b"mdat" and mdat_offset is None:
+                mdat_offset = box_start
+            elif box_type == b"moov":
+                info["moov_offset"] = box_start
+                info["moov_size"] = box_end - box_start
+                for child, _, child_payload, child_end in _boxes(data, payload, box_end):
+                    if child == b"mvhd":
+                        timescale, duration = _parse_mvhd(data, child_payload)
+                        if timescale:
+                            info["duration"] = duration / timescale
+                    elif child == b"trak":
+                        track = _parse_trak(data, child_payload, child_end)
+                        if track.get("handler") == "vide" and info["video_codec"] is None:
+                            info["video_codec"] = track.get("codec")
+                            info["width"] = track.get("width")
+                            info["height"] = track.get("height")
+                        elif track.get("handler") == "soun" and info["audio_codec"] is None:
+                            info["audio_codec"] = track.get("codec")
+
+        if not seen_ftyp:
+            raise Mp4Error("Missing ftyp box")
+        if info["moov_offset"] is not None:
+            info["faststart"] = mdat_offset is None or info["moov_offset"] < mdat_offset
+        return info
+
+def validate(info: Dict[str, Any]) -> Optional[str]:
+    """Reason the video would be rejected by TikTok, or None if it looks fine"""
+    if info["moov_offset"] is None:
+        return "Missing moov box"
+    if info["size"] > settings.MAX_FILE_SIZE:
+        return f"File too large: {info['size']} bytes"
+    if info["video_codec"] is None:
+        return "No video track"
+    if info["video_codec"] not in VIDEO_CODECS:
+        return f"Unsupported video codec: {info['video_codec']}"
+    duration = info["duration"] or 0
+    if duration < settings.VIDEO_MIN_DURATION_SECONDS or duration > settings.VIDEO_MAX_DURATION_SECONDS:
+        return f"Unsupported duration: {duration:.1f}s"
+    if min(info["width"] or 0, info["height"] or 0) < settings.VIDEO_MIN_RESOLUTION:
+        return f"Resolution too low: {info['width']}x{info['height']}"
+    return None
+
+def inspect(path: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Probe and validate; returns ``(info, rejection_reason)``"""
+    try:
+        info = probe(path)
+    except (Mp4Error, struct.error, ValueError, OSError) as e:
+        return None, f"Unreadable MP4: {e}"
+    return info, validate(info)
@@ -0,0 +1,24 @@
+import hashlib
+from typing import Optional
+from urllib.parse import urlsplit
+
+def proxy_id(proxy_url: Optional[str]) -> str:
+    """Stable id for a proxy, safe for Redis keys and logs
+
+    Proxy URLs may carry credentials (``user:pass@host``), so anything that
+    leaves the process names the proxy by a short digest of its URL.
+    """
+    if not proxy_url:
+        return "direct"
+    return hashlib.sha256(proxy_url.encode()).hexdigest()[:16]
+
+def redact_proxy(proxy_url: Optional[str]) -> str:
+    """Scheme, host and port of a proxy URL, without credentials"""
+    if not proxy_url:
+        return "direct"
+    try:
+        parts = urlsplit(proxy_url)
+        port = f":{parts.port}" if parts.port else ""
+    except ValueError:
+        return "invalid"
+    return f"{parts.scheme}://{parts.hostname or '?'}{port}"
@@ -0,0 +1,73 @@
+import asyncio
+from typing import List, Tuple
+import structlog
+from app.core.redis import get_async_redis
+
+logger = structlog.get_logger()
+
+# Reserves one token from every bucket in KEYS atomically and returns how long
+# the caller must wait before its reservation is honoured. Buckets may go
+# negative, which queues callers fairly instead of having them poll.
+# ARGV holds (rate_per_second, capacity) pairs, one per key.
+TOKEN_BUCKET_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local wait = 0
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[i * 2 - 1])
+    local capacity = tonumber(ARGV[i * 2])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate) - 1
+    if tokens < 0 then
+        wait = math.max(wait, -tokens / rate)
+    end
+    redis.call('HSET', key, 'tokens', tostring(tokens), 'ts', tostring(now))
+    -- Keep the key until the bucket has refilled, including any debt
+    redis.call('EXPIRE', key, math.ceil((capacity - tokens) / rate) + 60)
+end
+return tostring(wait)
+"""
+
+class TokenBucketLimiter:
+    """Redis-backed token buckets shared by every worker process"""
+
+    def __init__(self, prefix: str = "ratelimit"):
+        self.prefix = prefix
+        self._script = None
+
+    def _get_script(self):
+        if self._script is None:
+            self._script = get_async_redis().register_script(TOKEN_BUCKET_SCRIPT)
+        return self._script
+
+    async def reserve(self, buckets: List[Tuple[str, float, int]]) -> float:
+        """Reserve a token from each (name, rate_per_minute, burst) bucket
+
+        Names become Redis keys and show up in logs, so they must not carry
+        secrets (name proxies by ``app.core.proxy.proxy_id``). Returns the number of seconds to wait. Fails open if Redis is down;
+        raises ValueError for a bucket with a non-positive rate or burst.
+        """
+        for name, rate_per_minute, burst in buckets:
+            if rate_per_minute <= 0 or burst <= 0:
+                raise ValueError(f"Rate limit bucket {name!r} needs a positive rate and burst")
+
+        keys = [f"{self.prefix}:{name}" for name, _, _ in buckets]
+        args = []
+        for _, rate_per_minute, burst in buckets:
+            args.extend([rate_per_minute / 60.0, burst])
+
+        try:
+            return float(await self._get_script()(keys=keys, args=args))
+        except Exception as e:
+            logger.warning("Rate limiter unavailable", buckets=keys, error=str(e))
+            return 0.0
+
+    async def acquire(self, buckets: List[Tuple[str, float, int]]) -> float:
+        """Wait until every bucket allows one more request; returns the time waited"""
+        wait = await self.reserve(buckets)
+        if wait > 0:
+            logger.debug("Rate limited", buckets=[name for name, _, _ in buckets], wait=round(wait, 3))
+            await asyncio.sleep(wait)
+        return wait
@@ -0,0 +1,24 @@
+import redis
+import redis.asyncio as aioredis
+from app.core.config import settings
+
+_client = None
+_async_client = None
+
+def get_redis() -> redis.Redis:
+    """Shared synchronous Redis client (thread-safe, connection pooled)"""
+    global _client
+    
+    if _client is None:
+        _client = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    
+    return _client
+
+def get_async_redis() -> aioredis.Redis:
+    """Shared asyncio Redis client for use from the event loop"""
+    global _async_client
+    
+    if _async_client is None:
+        _async_client = aioredis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    
+    return _async_client
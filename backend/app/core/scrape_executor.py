@@ -0,0 +1,114 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+import structlog
+from app.core.config import settings
+
+logger = structlog.get_logger()
+
+class ScrapeExecutor:
+    """Bounded thread pool for blocking scraping calls
+
+    instagrapi is fully synchronous, so every call is shipped to a dedicated
+    pool of ``MAX_CONCURRENT_SCRAPES`` threads and awaited from the event loop.
+    The pool is created lazily so forked Celery workers each get their own.
+    """
+
+    def __init__(self, max_workers: int, default_timeout: float):
+        self.max_workers = max_workers
+        self.default_timeout = default_timeout
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._stats = {
+            "submitted": 0,
+            "started": 0,
+            "completed": 0,
+            "failed": 0,
+            "timeouts": 0,
+            "cancelled_before_start": 0,
+            "in_flight": 0,
+            "queue_wait_total": 0.0,
+            "queue_wait_max": 0.0,
+        }
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="scrape"
+                )
+            return self._executor
+
+    def _record(self, **changes):
+        with self._lock:
+            for key, value in changes.items():
+                self._stats[key] += value
+
+    async def run(self, fn: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """Run a blocking callable in the pool and await its result
+
+        On timeout the call is cancelled: if it is still queued it never
+        starts, if it is already running its result is discarded (Python
+        threads cannot be interrupted).
+        """
+        timeout = timeout if timeout is not None else self.default_timeout
+        cancelled = threading.Event()
+        submitted_at = time.monotonic()
+
+        def call():
+            if cancelled.is_set():
+                self._record(cancelled_before_start=1)
+                raise asyncio.CancelledError()
+
+            queue_wait = time.monotonic() - submitted_at
+            with self._lock:
+                self._stats["queue_wait_total"] += queue_wait
+                self._stats["queue_wait_max"] = max(self._stats["queue_wait_max"], queue_wait)
+                self._stats["started"] += 1
+                self._stats["in_flight"] += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._record(in_flight=-1)
+
+        self._record(submitted=1)
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._get_executor(), call)
+
+        try:
+            result = await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            cancelled.set()
+            self._record(timeouts=1)
+            logger.warning("Scrape call timed out", call=getattr(fn, "__name__", str(fn)), timeout=timeout)
+            raise
+        except Exception:
+            self._record(failed=1)
+            raise
+
+        self._record(completed=1)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of pool usage and queue-wait metrics"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["queue_wait_avg"] = stats["queue_wait_total"] / stats["started"] if stats["started"] else 0.0
+        stats["max_workers"] = self.max_workers
+        return stats
+
+    def shutdown(self):
+        """Stop the pool, dropping calls that have not started yet"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+# Global executor instance
+scrape_executor = ScrapeExecutor(
+    max_workers=settings.MAX_CONCURRENT_SCRAPES,
+    default_timeout=settings.SCRAPE_TIMEOUT_SECONDS
+)
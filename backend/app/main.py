@@ -7,6 +7,9 @@ from contextlib import asynccontextmanager
 
 from app.core.config import settings
 from app.core.database import engine, Base
+from app.core.scrape_executor import scrape_executor
+from app.services.download_service import video_downloader
+from app.services.tiktok_service import tiktok_service
 from app.api.v1.api import api_router
 from app.core.websocket import websocket_router
 
@@ -41,10 +44,14 @@ async def lifespan(app: FastAPI):
         await conn.run_sync(Base.metadata.create_all)
     
     logger.info("Database tables created successfully")
+    await tiktok_service.start()
     yield
     
     # Shutdown
     logger.info("Shutting down AutoReel API")
+    scrape_executor.shutdown()
+    await video_downloader.close()
+    await tiktok_service.close()
 
 app = FastAPI(
     title="AutoReel API",
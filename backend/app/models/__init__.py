@@ -1,7 +1,9 @@
 from .user import User
 from .tiktok_credentials import TikTokCredentials
+from .instagram_account import InstagramAccount
 from .monitored_profile import MonitoredProfile
 from .posted_reel import PostedReel
+from .publish_attempt import PublishAttempt
 from .application_log import ApplicationLog
 from .user_session import UserSession
 from .proxy_configuration import ProxyConfiguration
@@ -9,8 +11,10 @@ from .proxy_configuration import ProxyConfiguration
 __all__ = [
     "User",
     "TikTokCredentials", 
+    "InstagramAccount",
     "MonitoredProfile",
     "PostedReel",
+    "PublishAttempt",
     "ApplicationLog",
     "UserSession",
     "ProxyConfiguration"
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index
+from sqlalchemy.sql import func, text
+from sqlalchemy.orm import relationship
+from app.core.database import Base
+
+class InstagramAccount(Base):
+    """An Instagram account scraped once per cycle for all of its subscribers"""
+    __tablename__ = "instagram_accounts"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    username = Column(String(255), unique=True, index=True, nullable=False)
+    instagram_user_id = Column(String(32))
+    last_checked_at = Column(DateTime(timezone=True))
+    next_check_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    effective_interval_minutes = Column(Integer)
+    last_seen_reel_code = Column(String(50))
+    last_seen_taken_at = Column(DateTime(timezone=True))
+    consecutive_failures = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text)
+    quarantined_at = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    # Relationships
+    subscriptions = relationship("MonitoredProfile", back_populates="instagram_account")
+    
+    # Indexes
+    __table_args__ = (
+        Index('idx_accounts_due', 'next_check_at', postgresql_where=text('quarantined_at IS NULL')),
+        Index('idx_accounts_quarantined', 'next_check_at', postgresql_where=text('quarantined_at IS NOT NULL')),
+    )
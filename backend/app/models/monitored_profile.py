@@ -9,17 +9,20 @@ class MonitoredProfile(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     instagram_username = Column(String(255), nullable=False)
+    instagram_account_id = Column(Integer, ForeignKey("instagram_accounts.id", ondelete="SET NULL"))
     display_name = Column(String(255))
     profile_picture_url = Column(String)
     is_active = Column(Boolean, default=True)
     last_checked_at = Column(DateTime(timezone=True))
     last_posted_at = Column(DateTime(timezone=True))
     check_interval_minutes = Column(Integer, default=60)
+    adaptive_polling = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Relationships
     user = relationship("User", back_populates="monitored_profiles")
+    instagram_account = relationship("InstagramAccount", back_populates="subscriptions")
     posted_reels = relationship("PostedReel", back_populates="profile", cascade="all, delete-orphan")
     
     # Indexes
@@ -27,4 +30,5 @@ class MonitoredProfile(Base):
         Index('idx_user_instagram_unique', 'user_id', 'instagram_username', unique=True),
         Index('idx_active_profiles', 'is_active'),
         Index('idx_last_checked', 'last_checked_at'),
+        Index('idx_profiles_account', 'instagram_account_id', 'is_active'),
     )
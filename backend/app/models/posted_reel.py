@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, ARRAY, Index
+from sqlalchemy import Column, Integer, BigInteger, Float, String, DateTime, Text, ForeignKey, ARRAY, Index, text
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -8,13 +8,28 @@ class PostedReel(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     profile_id = Column(Integer, ForeignKey("monitored_profiles.id", ondelete="CASCADE"), nullable=False)
-    instagram_reel_code = Column(String(50), unique=True, index=True, nullable=False)
+    instagram_reel_code = Column(String(50), index=True, nullable=False)
     instagram_reel_url = Column(Text)
+    instagram_video_url = Column(Text)
     tiktok_post_id = Column(String(255))
     tiktok_post_url = Column(Text)
+    claimed_at = Column(DateTime(timezone=True))
+    lease_expires_at = Column(DateTime(timezone=True))
+    attempt_count = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime(timezone=True))
+    publish_id = Column(String(255))
+    publish_checks = Column(Integer, default=0, nullable=False)
+    next_publish_check_at = Column(DateTime(timezone=True))
     status = Column(String(50), default="pending", nullable=False)
     error_message = Column(Text)
     video_file_path = Column(Text)
+    video_sha256 = Column(String(64))
+    video_size_bytes = Column(BigInteger)
+    video_duration_seconds = Column(Float)
+    video_width = Column(Integer)
+    video_height = Column(Integer)
+    video_codec = Column(String(16))
+    video_moov_offset = Column(BigInteger)
     caption = Column(Text)
     hashtags = Column(ARRAY(Text))
     posted_at = Column(DateTime(timezone=True))
@@ -29,4 +44,17 @@ class PostedReel(Base):
         Index('idx_profile_reels', 'profile_id'),
         Index('idx_reel_status', 'status'),
         Index('idx_instagram_code', 'instagram_reel_code'),
+        Index('idx_reel_video_sha256', 'video_sha256'),
+        Index('idx_reel_pending_queue', 'created_at', postgresql_where=text("status = 'pending'")),
+        Index('idx_reel_downloaded_queue', 'created_at', postgresql_where=text("status = 'downloaded'")),
+        # Per-tenant queue heads for fair claims
+        Index(
+            'idx_reel_profile_queue',
+            'profile_id',
+            'created_at',
+            postgresql_where=text("status IN ('pending', 'downloaded')")
+        ),
+        Index('idx_reel_leases', 'lease_expires_at', postgresql_where=text("lease_expires_at IS NOT NULL")),
+        Index('idx_reel_publishing', 'next_publish_check_at', postgresql_where=text("status = 'publishing'")),
+        Index('idx_profile_reel_unique', 'profile_id', 'instagram_reel_code', unique=True),
     )
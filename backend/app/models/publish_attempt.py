@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Index, text
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class PublishAttempt(Base):
+    __tablename__ = "publish_attempts"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    reel_id = Column(Integer, ForeignKey("posted_reels.id", ondelete="CASCADE"), nullable=False)
+    instagram_reel_code = Column(String(50), nullable=False)
+    open_id = Column(String(255), nullable=False)
+    attempt = Column(Integer, nullable=False)
+    outcome = Column(String(20), default="started", nullable=False)  # started, succeeded, failed, abandoned
+    error_class = Column(String(20))  # retryable, permanent
+    error_message = Column(Text)
+    publish_id = Column(String(255))
+    started_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Renewed while the upload runs; a stale heartbeat means the worker is gone
+    heartbeat_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True))
+    
+    # Indexes
+    __table_args__ = (
+        # Idempotency key: one live or successful publish per reel and TikTok account
+        Index(
+            'idx_publish_attempt_key',
+            'instagram_reel_code',
+            'open_id',
+            unique=True,
+            postgresql_where=text("outcome IN ('started', 'succeeded')")
+        ),
+        Index('idx_publish_attempt_reel', 'reel_id'),
+        Index('idx_publish_attempt_publish_id', 'publish_id'),
+    )
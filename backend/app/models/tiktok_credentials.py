@@ -10,6 +10,7 @@ class TikTokCredentials(Base):
     access_token = Column(Text, nullable=False)
     refresh_token = Column(Text, nullable=False)
     expires_in = Column(Integer, nullable=False)
+    expires_at = Column(DateTime(timezone=True), index=True)
     open_id = Column(String(255), unique=True, index=True, nullable=False)
     scope = Column(String(500))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
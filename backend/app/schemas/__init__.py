@@ -1,5 +1,6 @@
 from .user import UserCreate, UserUpdate, UserResponse, UserLogin
 from .tiktok_credentials import TikTokCredentialsResponse
+from .monitored_profile import MonitoredProfileCreate, MonitoredProfileUpdate
 from .auth import Token, TokenData
 
 __all__ = [
@@ -8,6 +9,8 @@ __all__ = [
     "UserResponse",
     "UserLogin",
     "TikTokCredentialsResponse",
+    "MonitoredProfileCreate",
+    "MonitoredProfileUpdate",
     "Token",
     "TokenData"
 ]
@@ -0,0 +1,14 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+class MonitoredProfileCreate(BaseModel):
+    instagram_username: str = Field(..., min_length=1, max_length=255)
+    display_name: Optional[str] = None
+    check_interval_minutes: int = Field(60, ge=1)
+    adaptive_polling: bool = False
+
+class MonitoredProfileUpdate(BaseModel):
+    display_name: Optional[str] = None
+    is_active: Optional[bool] = None
+    check_interval_minutes: Optional[int] = Field(None, ge=1)
+    adaptive_polling: Optional[bool] = None
@@ -8,6 +8,7 @@ class TikTokCredentialsBase(BaseModel):
 
 class TikTokCredentialsResponse(TikTokCredentialsBase):
     user_id: int
+    expires_at: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
     
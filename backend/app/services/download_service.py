@@ -0,0 +1,214 @@
+import asyncio
+import hashlib
+import os
+import re
+import time
+from typing import Any, Dict, Optional
+import aiohttp
+from aiohttp_socks import ProxyConnector
+import structlog
+from app.core.config import settings
+
+logger = structlog.get_logger()
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36",
+    "Accept": "*/*",
+}
+
+CONTENT_RANGE_RE = re.compile(r"bytes (\d+)-(\d+)/(\d+|\*)")
+
+class DownloadError(Exception):
+    """A download failed; ``resumable`` tells whether the .part file was kept"""
+
+    def __init__(self, message: str, resumable: bool = False):
+        super().__init__(message)
+        self.resumable = resumable
+
+class VideoDownloader:
+    """Streaming, resumable video downloader with one pooled HTTP session per proxy
+
+    Sessions keep connections alive between downloads and route through the
+    proxy with aiohttp-socks (http, socks4 and socks5 URLs). Bytes land in a
+    ``.part`` file next to the target; a dropped connection is resumed with
+    an HTTP Range request and only the missing tail is fetched again. The
+    body is hashed while it is written, size limits are enforced as early as
+    possible and the finished file is moved into place atomically. Disk
+    writes happen in large blocks from a worker thread.
+    """
+
+    def __init__(self):
+        self._sessions: Dict[str, aiohttp.ClientSession] = {}
+        self._stats = {"downloads": 0, "failures": 0, "resumes": 0, "bytes": 0, "seconds": 0.0}
+
+    def _get_session(self, proxy_url: Optional[str]) -> aiohttp.ClientSession:
+        key = proxy_url or "direct"
+        session = self._sessions.get(key)
+
+        if session is None or session.closed:
+            connector_options = {
+                "limit_per_host": settings.DOWNLOAD_CONNECTIONS_PER_PROXY,
+                "keepalive_timeout": settings.DOWNLOAD_KEEPALIVE_SECONDS,
+            }
+            if proxy_url:
+                connector = ProxyConnector.from_url(proxy_url, **connector_options)
+            else:
+                connector = aiohttp.TCPConnector(**connector_options)
+
+            session = aiohttp.ClientSession(
+                connector=connector,
+                headers=DEFAULT_HEADERS,
+                timeout=aiohttp.ClientTimeout(total=settings.DOWNLOAD_TIMEOUT_SECONDS, sock_connect=15, sock_read=60)
+            )
+            self._sessions[key] = session
+
+        return session
+
+    @staticmethod
+    def _hash_existing(part_path: str) -> "tuple":
+        """Size and running hash of a partial file (runs in a worker thread)"""
+        hasher = hashlib.sha256()
+        if not os.path.exists(part_path):
+            return 0, hasher
+        size = 0
+        with open(part_path, "rb") as f:
+            for block in iter(lambda: f.read(settings.DOWNLOAD_WRITE_BUFFER_SIZE), b""):
+                hasher.update(block)
+                size += len(block)
+        return size, hasher
+
+    @staticmethod
+    def _write_block(f, hasher, data: bytes):
+        hasher.update(data)
+        f.write(data)
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    async def _attempt(self, url: str, part_path: str, proxy_url: Optional[str]) -> Dict[str, Any]:
+        """One request; appends to the .part file from where it stopped"""
+        max_size = settings.MAX_FILE_SIZE
+        offset, hasher = await asyncio.to_thread(self._hash_existing, part_path)
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+        async with self._get_session(proxy_url).get(url, headers=headers) as response:
+            if response.status == 416 and offset:
+                # The .part file may already hold everything the server has
+                total = response.headers.get("Content-Range", "").rsplit("/", 1)[-1]
+                if total.isdigit() and int(total) == offset:
+                    return {"bytes": offset, "sha256": hasher.hexdigest()}
+                await asyncio.to_thread(self._remove, part_path)
+                raise DownloadError("Range not satisfiable, restarting", resumable=True)
+
+            if response.status == 206 and offset:
+                match = CONTENT_RANGE_RE.match(response.headers.get("Content-Range", ""))
+                if not match or int(match.group(1)) != offset:
+                    await asyncio.to_thread(self._remove, part_path)
+                    raise DownloadError("Unexpected Content-Range, restarting", resumable=True)
+                self._stats["resumes"] += 1
+                mode = "ab"
+            elif response.status == 200:
+                # Server ignored the Range header: start over
+                offset, hasher = 0, hashlib.sha256()
+                mode = "wb"
+            else:
+                raise DownloadError(f"HTTP {response.status}", resumable=response.status >= 500)
+
+            expected = None
+            if response.content_length is not None:
+                expected = offset + response.content_length
+                if expected > max_size:
+                    await asyncio.to_thread(self._remove, part_path)
+                    raise DownloadError(f"File too large: {expected} bytes")
+
+            f = await asyncio.to_thread(open, part_path, mode)
+            written = offset
+            buffer = bytearray()
+            try:
+                async for chunk in response.content.iter_chunked(settings.DOWNLOAD_CHUNK_SIZE):
+                    buffer.extend(chunk)
+                    if written + len(buffer) > max_size:
+                        raise DownloadError(f"File exceeds {max_size} bytes")
+                    if len(buffer) >= settings.DOWNLOAD_WRITE_BUFFER_SIZE:
+                        await asyncio.to_thread(self._write_block, f, hasher, bytes(buffer))
+                        written += len(buffer)
+                        buffer.clear()
+                if buffer:
+                    await asyncio.to_thread(self._write_block, f, hasher, bytes(buffer))
+                    written += len(buffer)
+            except DownloadError:
+                await asyncio.to_thread(f.close)
+                await asyncio.to_thread(self._remove, part_path)
+                raise
+            except Exception as e:
+                # Keep what we have: flush the buffer so the next attempt resumes after it
+                if buffer:
+                    await asyncio.to_thread(self._write_block, f, hasher, bytes(buffer))
+                await asyncio.to_thread(f.close)
+                raise DownloadError(str(e), resumable=True)
+            await asyncio.to_thread(f.close)
+
+            if expected is not None and written < expected:
+                raise DownloadError(f"Connection closed at {written}/{expected} bytes", resumable=True)
+
+        return {"bytes": written, "sha256": hasher.hexdigest()}
+
+    async def download(self, url: str, file_path: str, proxy_url: Optional[str] = None) -> Dict[str, Any]:
+        """Download ``url`` into ``file_path``, resuming partial transfers
+
+        Returns a dict with ``success``, ``bytes``, ``sha256``, ``seconds``
+        and ``throughput`` (bytes per second), plus ``error`` on failure.
+        """
+        part_path = f"{file_path}.part"
+        started = time.monotonic()
+        result = None
+        error = None
+
+        for attempt in range(1, settings.DOWNLOAD_MAX_ATTEMPTS + 1):
+            try:
+                result = await self._attempt(url, part_path, proxy_url)
+                break
+            except DownloadError as e:
+                error = e
+            except Exception as e:
+                error = DownloadError(str(e), resumable=True)
+
+            logger.warning("Download attempt failed", file_path=file_path, attempt=attempt, error=str(error))
+            if not error.resumable:
+                break
+
+        if result is None:
+            self._stats["failures"] += 1
+            logger.error("Error downloading video", error=str(error), file_path=file_path)
+            return {"success": False, "error": str(error), "bytes": 0, "resumable": error.resumable}
+
+        await asyncio.to_thread(os.replace, part_path, file_path)
+
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self._stats["downloads"] += 1
+        self._stats["bytes"] += result["bytes"]
+        self._stats["seconds"] += elapsed
+
+        result.update({"success": True, "seconds": round(elapsed, 3), "throughput": int(result["bytes"] / elapsed)})
+        logger.info("Video downloaded successfully", file_path=file_path, **result)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Aggregate download counters and average throughput"""
+        stats = dict(self._stats)
+        stats["throughput_avg"] = int(stats["bytes"] / stats["seconds"]) if stats["seconds"] else 0
+        stats["open_sessions"] = sum(1 for session in self._sessions.values() if not session.closed)
+        return stats
+
+    async def close(self):
+        """Close every pooled session"""
+        sessions, self._sessions = self._sessions, {}
+        for session in sessions.values():
+            await session.close()
+
+# Global downloader instance
+video_downloader = VideoDownloader()
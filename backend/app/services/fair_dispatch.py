@@ -0,0 +1,96 @@
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional
+from sqlalchemy import select, func, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.instagram_account import InstagramAccount
+from app.models.monitored_profile import MonitoredProfile
+from app.models.posted_reel import PostedReel
+
+# Reel statuses that are waiting in (or working through) the pipeline
+QUEUED_STATUSES = ("pending", "downloading", "downloaded", "posting", "publishing")
+
+def interleave(items: Iterable[Any], key: Callable[[Any], Hashable]) -> List[Any]:
+    """Round-robin ``items`` across tenants, keeping each tenant's own order
+
+    ``[a1, a2, a3, b1]`` becomes ``[a1, b1, a2, a3]``, so a tenant with a
+    long list cannot push everyone else to the back of a FIFO queue.
+    """
+    lanes: "OrderedDict[Hashable, deque]" = OrderedDict()
+    for item in items:
+        lanes.setdefault(key(item), deque()).append(item)
+
+    ordered = []
+    while lanes:
+        for tenant in list(lanes):
+            lane = lanes[tenant]
+            ordered.append(lane.popleft())
+            if not lane:
+                del lanes[tenant]
+    return ordered
+
+class FairDispatch:
+    """Per-tenant view of the monitoring and posting queues
+
+    Claims take work round-robin by ``user_id`` (each tenant's oldest item,
+    then each tenant's second oldest, ...), so one tenant's backlog only
+    delays its own work. These stats show whether that holds: queue depth
+    and the oldest wait per tenant and status.
+    """
+
+    async def queue_stats(self, db: AsyncSession, user_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Per-tenant stats, for every tenant or only ``user_id``"""
+        now = datetime.now(timezone.utc)
+        tenants: Dict[int, Dict[str, Any]] = {}
+
+        def tenant(user_id: int) -> Dict[str, Any]:
+            return tenants.setdefault(user_id, {
+                "user_id": user_id,
+                "depth": {},
+                "oldest_wait_seconds": {},
+                "monitoring_due": 0,
+                "monitoring_lag_seconds": 0.0
+            })
+
+        tenant_filter = [MonitoredProfile.user_id == user_id] if user_id is not None else []
+        reels = await db.execute(
+            select(
+                MonitoredProfile.user_id,
+                PostedReel.status,
+                func.count(PostedReel.id),
+                func.min(PostedReel.created_at)
+            )
+            .join(MonitoredProfile, PostedReel.profile_id == MonitoredProfile.id)
+            .where(PostedReel.status.in_(QUEUED_STATUSES), *tenant_filter)
+            .group_by(MonitoredProfile.user_id, PostedReel.status)
+        )
+        for user_id, status, depth, oldest in reels.all():
+            stats = tenant(user_id)
+            stats["depth"][status] = depth
+            stats["oldest_wait_seconds"][status] = round((now - oldest).total_seconds(), 1) if oldest else 0.0
+
+        accounts = await db.execute(
+            select(
+                MonitoredProfile.user_id,
+                func.count(func.distinct(InstagramAccount.id)),
+                func.min(InstagramAccount.next_check_at)
+            )
+            .join(
+                MonitoredProfile,
+                and_(
+                    MonitoredProfile.instagram_account_id == InstagramAccount.id,
+                    MonitoredProfile.is_active == True
+                )
+            )
+            .where(InstagramAccount.quarantined_at.is_(None), InstagramAccount.next_check_at <= now, *tenant_filter)
+            .group_by(MonitoredProfile.user_id)
+        )
+        for user_id, due, oldest in accounts.all():
+            stats = tenant(user_id)
+            stats["monitoring_due"] = due
+            stats["monitoring_lag_seconds"] = round((now - oldest).total_seconds(), 1) if oldest else 0.0
+
+        return sorted(tenants.values(), key=lambda stats: stats["user_id"])
+
+# Global dispatch instance
+fair_dispatch = FairDispatch()
@@ -0,0 +1,151 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional, Tuple
+from instagrapi import Client
+import structlog
+from app.core.config import settings
+from app.core.proxy import proxy_id, redact_proxy
+from app.core.redis import get_redis
+
+logger = structlog.get_logger()
+
+class _PooledClient:
+    def __init__(self, client: Client, serialized: Optional[str]):
+        self.client = client
+        self.last_used = time.monotonic()
+        self.serialized = serialized
+        self.cookies = dict(client.cookie_dict)
+
+class InstagramClientPool:
+    """Pool of warm instagrapi clients keyed by account and proxy
+
+    Client settings (device ids, cookies, authorization) are stored in Redis
+    so every Celery worker reuses the same session instead of presenting a
+    brand-new device on each request. The pool is only touched from scrape
+    executor threads. A checked-out client belongs to one thread; the pool
+    lock is only held to check clients out and back in, so concurrent
+    scrapes through the same account and proxy each get their own client
+    (up to ``INSTAGRAM_CLIENTS_PER_KEY`` of them are kept warm per key).
+    Settings are written back when a call changed the cookies, and when a
+    client leaves the pool.
+    """
+
+    def __init__(self, factory: Callable[[Optional[str]], Client], max_size: int, idle_seconds: int):
+        self.factory = factory
+        self.max_size = max_size
+        self.idle_seconds = idle_seconds
+        self.per_key = settings.INSTAGRAM_CLIENTS_PER_KEY or settings.MAX_CONCURRENT_SCRAPES
+        # key -> idle clients, oldest first; keys in least recently used order
+        self._idle: "OrderedDict[str, List[_PooledClient]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _key(self, account: str, proxy: Optional[str]) -> str:
+        # Hashed: the key ends up in Redis and in logs, the proxy URL may hold credentials
+        return f"{account}|{proxy_id(proxy)}"
+
+    def _store_key(self, key: str) -> str:
+        return f"instagram:session:{key}"
+
+    def _load_settings(self, key: str) -> Optional[str]:
+        try:
+            return get_redis().get(self._store_key(key))
+        except Exception as e:
+            logger.warning("Could not load Instagram session", key=key, error=str(e))
+            return None
+
+    def _dump_settings(self, key: str, entry: _PooledClient):
+        serialized = json.dumps(entry.client.get_settings(), sort_keys=True, default=str)
+        if serialized == entry.serialized:
+            return
+        try:
+            get_redis().set(self._store_key(key), serialized, ex=settings.INSTAGRAM_SESSION_TTL_SECONDS)
+            entry.serialized = serialized
+        except Exception as e:
+            logger.warning("Could not persist Instagram session", key=key, error=str(e))
+
+    def _persist_if_changed(self, key: str, entry: _PooledClient):
+        """Write the session back only when the last call changed its cookies"""
+        cookies = dict(entry.client.cookie_dict)
+        if cookies != entry.cookies:
+            entry.cookies = cookies
+            self._dump_settings(key, entry)
+
+    def _build(self, key: str, account: str, proxy: Optional[str]) -> _PooledClient:
+        """Create a client, restoring its session from the shared store"""
+        client = self.factory(proxy)
+        serialized = self._load_settings(key)
+        if serialized:
+            client.set_settings(json.loads(serialized))
+            if proxy:
+                # set_settings re-initialises the client, so re-apply the proxy
+                client.set_proxy(proxy)
+
+        entry = _PooledClient(client, serialized)
+        if settings.INSTAGRAM_USERNAME and account == settings.INSTAGRAM_USERNAME:
+            # Reuses the stored authorization when it is still valid
+            client.login(settings.INSTAGRAM_USERNAME, settings.INSTAGRAM_PASSWORD)
+        entry.cookies = dict(client.cookie_dict)
+        self._dump_settings(key, entry)
+
+        logger.info("Instagram client session ready", key=key, proxy=redact_proxy(proxy), restored=bool(serialized))
+        return entry
+
+    def _evict(self) -> List[Tuple[str, _PooledClient]]:
+        """Take out idle clients past the idle timeout, then least recently used ones over the cap
+
+        Called with the pool lock held; the caller persists what was evicted.
+        """
+        now = time.monotonic()
+        total = sum(len(idle) for idle in self._idle.values())
+        evicted = []
+        for key in list(self._idle):
+            idle = self._idle[key]
+            while idle and (total >= self.max_size or now - idle[0].last_used >= self.idle_seconds):
+                evicted.append((key, idle.pop(0)))
+                total -= 1
+            if not idle:
+                del self._idle[key]
+        return evicted
+
+    @contextmanager
+    def acquire(self, proxy: Optional[str] = None, account: Optional[str] = None) -> Iterator[Client]:
+        """Check out a client for an account/proxy pair, building one if none is idle"""
+        account = account or settings.INSTAGRAM_USERNAME or "anonymous"
+        key = self._key(account, proxy)
+
+        evicted = []
+        with self._lock:
+            idle = self._idle.get(key)
+            # The most recently returned client is the warmest
+            entry = idle.pop() if idle else None
+            if entry is None:
+                evicted = self._evict()
+
+        for evicted_key, evicted_entry in evicted:
+            self._dump_settings(evicted_key, evicted_entry)
+            logger.info("Instagram client evicted", key=evicted_key)
+
+        if entry is None:
+            entry = self._build(key, account, proxy)
+
+        try:
+            yield entry.client
+        finally:
+            entry.last_used = time.monotonic()
+            self._persist_if_changed(key, entry)
+            with self._lock:
+                idle = self._idle.setdefault(key, [])
+                self._idle.move_to_end(key)
+                surplus = len(idle) >= self.per_key
+                if not surplus:
+                    idle.append(entry)
+            if surplus:
+                # More clients were built for a burst than are kept warm
+                self._dump_settings(key, entry)
+
+    def size(self) -> int:
+        with self._lock:
+            return sum(len(idle) for idle in self._idle.values())
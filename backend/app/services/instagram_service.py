@@ -1,44 +1,146 @@
 import asyncio
 import os
 import random
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime
 from instagrapi import Client
-from instagrapi.exceptions import LoginRequired, ChallengeRequired, TwoFactorRequired
+from instagrapi.exceptions import UserNotFound, NotFoundError, ClientNotFoundError, PrivateAccount
 import structlog
 from app.core.config import settings
+from app.core.cache import LRUCache
+from app.core.proxy import proxy_id
+from app.core.rate_limiter import TokenBucketLimiter
+from app.core.redis import get_async_redis
+from app.core.scrape_executor import scrape_executor
+from app.services.download_service import video_downloader
+from app.services.instagram_client_pool import InstagramClientPool
 from app.models.proxy_configuration import ProxyConfiguration
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update, func, case, and_, true
 
 logger = structlog.get_logger()
 
+# Errors that describe the profile itself; every other error is about our side
+PROFILE_ERRORS = (UserNotFound, NotFoundError, ClientNotFoundError, PrivateAccount)
+
+def is_profile_error(error: Exception) -> bool:
+    """Whether a scrape failed because of the profile itself (gone, renamed, private)
+
+    Anything else (timeouts, blocked proxies, rate limits, challenges, login
+    or session trouble, unknown errors) is transient and says nothing about
+    the profile.
+    """
+    return isinstance(error, PROFILE_ERRORS)
+
 class InstagramService:
     """Enhanced Instagram service using instagrapi library"""
     
     def __init__(self):
-        self.sessions_dir = "instagram_sessions"
         self.proxy_list = []
         self.current_proxy_index = 0
         
-        # Create sessions directory if it doesn't exist
-        if not os.path.exists(self.sessions_dir):
-            os.makedirs(self.sessions_dir)
+        # Warm clients are reused across calls; sessions live in Redis
+        self.client_pool = InstagramClientPool(
+            factory=self._create_client,
+            max_size=settings.INSTAGRAM_CLIENT_POOL_SIZE,
+            idle_seconds=settings.INSTAGRAM_CLIENT_IDLE_SECONDS
+        )
+        
+        # username -> numeric Instagram user id, backed by Redis and the DB
+        self.user_id_cache = LRUCache(settings.INSTAGRAM_USER_ID_CACHE_SIZE)
+        
+        # Request budgets shared across all workers
+        self.rate_limiter = TokenBucketLimiter(prefix="ratelimit:instagram")
     
     def _create_client(self, proxy: Optional[str] = None) -> Client:
-        """Create Instagram client with proxy support"""
+        """Create Instagram client with proxy support (used by the client pool)"""
         cl = Client()
         
         if proxy:
             cl.set_proxy(proxy)
         
         # Configure client settings for better stability
-        cl.delay_range = [1, 3]  # Random delay between requests
+        cl.delay_range = None  # Pacing is done by the shared rate limiter
         cl.request_timeout = 30
         cl.auto_patch = True
         
         return cl
     
+    async def _scrape(self, proxy_url: Optional[str], method: str, *args, **kwargs) -> Any:
+        """Call an instagrapi client method on a pooled client in the scrape executor
+        
+        Every call first takes a token from the proxy and account buckets, so
+        the whole fleet stays under the configured request rates.
+        """
+        account = settings.INSTAGRAM_USERNAME or "anonymous"
+        await self.rate_limiter.acquire([
+            (f"proxy:{proxy_id(proxy_url)}", settings.INSTAGRAM_PROXY_RATE_PER_MINUTE, settings.INSTAGRAM_PROXY_BURST),
+            (f"account:{account}", settings.INSTAGRAM_ACCOUNT_RATE_PER_MINUTE, settings.INSTAGRAM_ACCOUNT_BURST),
+        ])
+        
+        def call():
+            with self.client_pool.acquire(proxy_url, account) as cl:
+                return getattr(cl, method)(*args, **kwargs)
+        
+        return await scrape_executor.run(call)
+    
+    def _user_id_key(self, username: str) -> str:
+        return f"instagram:user_id:{username.lower()}"
+    
+    async def resolve_user_id(
+        self,
+        username: str,
+        proxy_url: Optional[str] = None,
+        known_user_id: Optional[str] = None,
+        raise_errors: bool = False
+    ) -> Optional[str]:
+        """Resolve a username to its numeric user id
+        
+        Lookup order: ``known_user_id`` (persisted on the profile), the
+        in-process LRU, Redis, and only then an Instagram request. Returns
+        None when the lookup fails, unless ``raise_errors`` is set.
+        """
+        if known_user_id:
+            self.user_id_cache.set(username, known_user_id)
+            return known_user_id
+        
+        user_id = self.user_id_cache.get(username)
+        if user_id:
+            return user_id
+        
+        try:
+            user_id = await get_async_redis().get(self._user_id_key(username))
+        except Exception as e:
+            logger.warning("User id cache unavailable", username=username, error=str(e))
+            user_id = None
+        
+        if not user_id:
+            try:
+                user_id = str(await self._scrape(proxy_url, "user_id_from_username", username))
+            except Exception as e:
+                logger.error("Error resolving user id", username=username, error=str(e))
+                if raise_errors:
+                    raise
+                return None
+            
+            try:
+                await get_async_redis().set(
+                    self._user_id_key(username), user_id, ex=settings.INSTAGRAM_USER_ID_TTL_SECONDS
+                )
+            except Exception as e:
+                logger.warning("Could not cache user id", username=username, error=str(e))
+        
+        self.user_id_cache.set(username, user_id)
+        return user_id
+    
+    async def invalidate_user_id(self, username: str):
+        """Forget a cached user id, e.g. after the account was renamed or deleted"""
+        self.user_id_cache.delete(username)
+        try:
+            await get_async_redis().delete(self._user_id_key(username))
+        except Exception as e:
+            logger.warning("Could not invalidate cached user id", username=username, error=str(e))
+    
     async def get_working_proxy(self, db: AsyncSession) -> Optional[str]:
         """Get a working proxy from the database"""
         result = await db.execute(
@@ -74,15 +176,42 @@ class InstagramService:
             
             await db.commit()
     
+    async def record_proxy_results(self, db: AsyncSession, results: Dict[str, Tuple[int, int]]):
+        """Add ``(successes, failures)`` per proxy URL in one statement per proxy
+
+        Used after concurrent scrapes, which cannot touch the session while
+        they run. Same rules as ``update_proxy_stats``: successes re-activate a
+        proxy, failures deactivate it once more than 70% of over 10 attempts
+        failed. The caller commits.
+        """
+        for proxy_url, (successes, failures) in results.items():
+            if not proxy_url or not (successes or failures):
+                continue
+            success_count = func.coalesce(ProxyConfiguration.success_count, 0) + successes
+            failure_count = func.coalesce(ProxyConfiguration.failure_count, 0) + failures
+            total = success_count + failure_count
+            is_active = true() if successes else ProxyConfiguration.is_active
+            if failures:
+                is_active = case((and_(total > 10, failure_count * 10 > total * 7), False), else_=is_active)
+            await db.execute(
+                update(ProxyConfiguration)
+                .where(ProxyConfiguration.proxy_url == proxy_url)
+                .values(
+                    success_count=success_count,
+                    failure_count=failure_count,
+                    is_active=is_active,
+                    last_used_at=func.now()
+                )
+                .execution_options(synchronize_session=False)
+            )
+    
     async def get_profile_info(self, username: str, db: AsyncSession) -> Optional[Dict[str, Any]]:
         """Get Instagram profile information using instagrapi"""
         proxy_url = await self.get_working_proxy(db)
         
         try:
-            cl = self._create_client(proxy_url)
-            
             # Get user info
-            user_info = cl.user_info_by_username(username)
+            user_info = await self._scrape(proxy_url, "user_info_by_username", username)
             
             profile_info = {
                 'username': user_info.username,
@@ -111,45 +240,117 @@ class InstagramService:
                 await self.update_proxy_stats(db, proxy_url, False)
             return None
     
-    async def get_recent_reels(self, username: str, max_count: int = 12, db: AsyncSession = None) -> List[Dict[str, Any]]:
-        """Get recent Reels from Instagram profile using instagrapi"""
-        proxy_url = await self.get_working_proxy(db) if db else None
+    def _serialize_reel(self, reel) -> Dict[str, Any]:
+        """Convert an instagrapi Media object into the reel dict used across the app"""
+        return {
+            'id': reel.code,
+            'url': f"https://www.instagram.com/reel/{reel.code}/",
+            'caption': reel.caption_text if reel.caption_text else '',
+            'video_url': reel.video_url,
+            'thumbnail_url': reel.thumbnail_url,
+            'likes_count': reel.like_count,
+            'comments_count': reel.comment_count,
+            'taken_at_timestamp': int(reel.taken_at.timestamp()),
+            'duration': reel.video_duration,
+            'is_video': True
+        }
+    
+    def _is_known_reel(self, reel_info: Dict[str, Any], since_timestamp: Optional[int], known_code: Optional[str]) -> bool:
+        """Check whether a reel is the cursor reel or older than the high-water mark
+
+        Reels taken in the same second as the cursor reel are kept; the unique
+        index on ``(profile_id, instagram_reel_code)`` drops the ones already
+        ingested.
+        """
+        if known_code and reel_info['id'] == known_code:
+            return True
+        return since_timestamp is not None and reel_info['taken_at_timestamp'] < since_timestamp
+    
+    async def probe_profile(self, username: str, proxy_url: Optional[str] = None) -> Optional[str]:
+        """Cheap availability check: returns the user id if the profile is public and reachable"""
+        try:
+            user_info = await self._scrape(proxy_url, "user_info_by_username", username)
+        except Exception as e:
+            logger.info("Profile probe failed", username=username, error=str(e))
+            return None
+        
+        if user_info.is_private:
+            logger.info("Profile probe: account is private", username=username)
+            return None
+        return str(user_info.pk)
+    
+    async def get_recent_reels(
+        self,
+        username: str,
+        max_count: int = None,
+        db: AsyncSession = None,
+        since_timestamp: Optional[int] = None,
+        known_code: Optional[str] = None,
+        proxy_url: Optional[str] = None,
+        user_id: Optional[str] = None,
+        raise_errors: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Get recent Reels from Instagram profile using instagrapi
+        
+        When ``since_timestamp`` (the profile's high-water mark) is given, only
+        Reels newer than it are returned and paging stops as soon as a page
+        reaches already-known media. Without a cursor a single page is fetched.
+        
+        Callers fetching many profiles concurrently pass ``proxy_url`` and no
+        ``db``, since an AsyncSession cannot be shared between coroutines.
+        A ``user_id`` saves the username lookup; if fetching with it fails the
+        cached mapping is invalidated. Errors are logged and an empty list is
+        returned, unless ``raise_errors`` is set.
+        """
+        if proxy_url is None and db:
+            proxy_url = await self.get_working_proxy(db)
+        page_size = max_count or settings.REEL_DISCOVERY_PAGE_SIZE
         
         try:
-            cl = self._create_client(proxy_url)
-            
-            # Get user ID
-            user_id = cl.user_id_from_username(username)
-            
-            # Get user's clips (reels)
-            reels_data = cl.user_clips(user_id, amount=max_count)
+            if not user_id:
+                user_id = await self.resolve_user_id(username, proxy_url, raise_errors=raise_errors)
+                if not user_id:
+                    return []
             
             reels = []
-            for reel in reels_data:
-                reel_info = {
-                    'id': reel.code,
-                    'url': f"https://www.instagram.com/reel/{reel.code}/",
-                    'caption': reel.caption_text if reel.caption_text else '',
-                    'video_url': reel.video_url,
-                    'thumbnail_url': reel.thumbnail_url,
-                    'likes_count': reel.like_count,
-                    'comments_count': reel.comment_count,
-                    'taken_at_timestamp': int(reel.taken_at.timestamp()),
-                    'duration': reel.video_duration,
-                    'is_video': True
-                }
-                reels.append(reel_info)
+            end_cursor = ""
+            for _ in range(settings.REEL_DISCOVERY_MAX_PAGES):
+                # Get a page of the user's clips (reels), newest first
+                page, end_cursor = await self._scrape(
+                    proxy_url, "user_clips_paginated_v1", user_id, amount=page_size, end_cursor=end_cursor
+                )
+                
+                page_reels = [self._serialize_reel(reel) for reel in page]
+                reels.extend(
+                    reel_info for reel_info in page_reels
+                    if not self._is_known_reel(reel_info, since_timestamp, known_code)
+                )
+                
+                # Pinned clips can be older than the cursor, so only the oldest
+                # item of a page tells whether we crossed into known media
+                if (
+                    since_timestamp is None
+                    or not page_reels
+                    or not end_cursor
+                    or self._is_known_reel(page_reels[-1], since_timestamp, known_code)
+                ):
+                    break
             
             if proxy_url and db:
                 await self.update_proxy_stats(db, proxy_url, True)
             
-            logger.info("Reels retrieved", username=username, count=len(reels))
+            logger.info("Reels retrieved", username=username, count=len(reels), since=since_timestamp)
             return reels
             
         except Exception as e:
             logger.error("Error fetching reels", username=username, error=str(e))
+            if isinstance(e, (UserNotFound, ClientNotFoundError)):
+                # The cached id no longer points at this username
+                await self.invalidate_user_id(username)
             if proxy_url and db:
                 await self.update_proxy_stats(db, proxy_url, False)
+            if raise_errors:
+                raise
             return []
     
     async def _old_get_recent_reels(self, username: str, max_count: int = 12, db: AsyncSession = None) -> List[Dict[str, Any]]:
@@ -236,41 +437,15 @@ class InstagramService:
                 return []
     
     async def download_video(self, video_url: str, file_path: str, db: AsyncSession = None) -> bool:
-        """Download video from Instagram"""
+        """Download video from Instagram through the pooled download engine"""
         proxy_url = await self.get_working_proxy(db) if db else None
         
-        connector = None
-        if proxy_url:
-            connector = aiohttp.TCPConnector()
+        result = await video_downloader.download(video_url, file_path, proxy_url)
         
-        try:
-            async with aiohttp.ClientSession(
-                headers=self.headers,
-                connector=connector,
-                timeout=aiohttp.ClientTimeout(total=120)
-            ) as session:
-                async with session.get(video_url) as response:
-                    if response.status == 200:
-                        with open(file_path, 'wb') as f:
-                            async for chunk in response.content.iter_chunked(8192):
-                                f.write(chunk)
-                        
-                        if proxy_url and db:
-                            await self.update_proxy_stats(db, proxy_url, True)
-                        
-                        logger.info("Video downloaded successfully", file_path=file_path)
-                        return True
-                    else:
-                        logger.warning("Failed to download video", status=response.status)
-                        if proxy_url and db:
-                            await self.update_proxy_stats(db, proxy_url, False)
-                        return False
-                        
-        except Exception as e:
-            logger.error("Error downloading video", error=str(e), file_path=file_path)
-            if proxy_url and db:
-                await self.update_proxy_stats(db, proxy_url, False)
-            return False
+        if proxy_url and db:
+            await self.update_proxy_stats(db, proxy_url, result["success"])
+        
+        return result["success"]
 
 # Global service instance
 instagram_service = InstagramService()
@@ -0,0 +1,66 @@
+import hashlib
+import hmac
+import re
+import time
+from typing import Optional
+import httpx
+import structlog
+from app.core.config import settings
+
+logger = structlog.get_logger()
+
+SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+
+class MediaService:
+    """Signed, expiring URLs for videos in the local store
+
+    A URL carries the video digest and an expiry timestamp, signed with
+    HMAC-SHA256 over ``SECRET_KEY``. TikTok can then pull the file straight
+    from the media endpoint (``PULL_FROM_URL``) instead of the workers
+    pushing every byte through ``FILE_UPLOAD``.
+    """
+
+    def __init__(self):
+        self._reachable: Optional[bool] = None
+        self._reachable_checked_at = 0.0
+
+    def sign(self, sha256: str, expires: int) -> str:
+        message = f"{sha256}:{expires}".encode()
+        return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()
+
+    def verify(self, sha256: str, expires: int, signature: str) -> bool:
+        """Constant-time signature check that also rejects expired links"""
+        if not SHA256_RE.match(sha256) or expires < time.time():
+            return False
+        return hmac.compare_digest(self.sign(sha256, expires), signature)
+
+    def signed_url(self, sha256: str, ttl_seconds: Optional[int] = None) -> Optional[str]:
+        """Public URL for a stored video, or None if no public base URL is configured"""
+        if not settings.MEDIA_PUBLIC_BASE_URL:
+            return None
+        expires = int(time.time()) + (ttl_seconds or settings.MEDIA_URL_TTL_SECONDS)
+        base = settings.MEDIA_PUBLIC_BASE_URL.rstrip("/")
+        return f"{base}/api/v1/media/{sha256}.mp4?expires={expires}&signature={self.sign(sha256, expires)}"
+
+    async def is_reachable(self) -> bool:
+        """Whether the public base URL answers; cached for a few minutes"""
+        if not settings.MEDIA_PUBLIC_BASE_URL:
+            return False
+
+        now = time.monotonic()
+        if self._reachable is not None and now - self._reachable_checked_at < settings.MEDIA_REACHABILITY_TTL_SECONDS:
+            return self._reachable
+
+        url = f"{settings.MEDIA_PUBLIC_BASE_URL.rstrip('/')}/health"
+        try:
+            async with httpx.AsyncClient(timeout=5.0) as client:
+                response = await client.get(url)
+            self._reachable = response.status_code == 200
+        except httpx.HTTPError as e:
+            logger.warning("Media endpoint unreachable", url=url, error=str(e))
+            self._reachable = False
+        self._reachable_checked_at = now
+        return self._reachable
+
+# Global service instance
+media_service = MediaService()
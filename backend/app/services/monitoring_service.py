@@ -0,0 +1,223 @@
+import asyncio
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+import structlog
+from app.models.instagram_account import InstagramAccount
+from app.models.monitored_profile import MonitoredProfile
+from app.services.instagram_service import instagram_service, is_profile_error
+from app.services.reel_ingestion_service import reel_ingestion_service
+from app.services.scheduler_service import account_scheduler
+
+logger = structlog.get_logger()
+
+class MonitoringService:
+    """Checks shared Instagram accounts for new Reels and fans them out to subscribers"""
+
+    async def discover_reels(self, account: InstagramAccount, proxy_url: Optional[str] = None) -> Dict[str, Any]:
+        """Discover Reels published since the account's high-water mark
+
+        Returns the new reels together with the Instagram user id that is now
+        cached for the username (None if the lookup failed and was invalidated),
+        the error message if the account could not be fetched and whether that
+        error was about the profile itself rather than transient.
+        """
+        username = account.username
+        since_timestamp = int(account.last_seen_taken_at.timestamp()) if account.last_seen_taken_at else None
+
+        reels = []
+        error = None
+        profile_error = False
+        try:
+            user_id = await instagram_service.resolve_user_id(
+                username, proxy_url, known_user_id=account.instagram_user_id, raise_errors=True
+            )
+            reels = await instagram_service.get_recent_reels(
+                username,
+                since_timestamp=since_timestamp,
+                known_code=account.last_seen_reel_code,
+                proxy_url=proxy_url,
+                user_id=user_id,
+                raise_errors=True
+            )
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            profile_error = is_profile_error(e)
+
+        return {
+            "reels": reels,
+            "instagram_user_id": instagram_service.user_id_cache.get(username),
+            "error": error,
+            "profile_error": profile_error
+        }
+
+    async def _load_subscriptions(self, db: AsyncSession, account_ids: List[int]) -> Dict[int, List[Dict[str, Any]]]:
+        """Active subscriptions per account, in one query"""
+        result = await db.execute(
+            select(
+                MonitoredProfile.id,
+                MonitoredProfile.user_id,
+                MonitoredProfile.instagram_account_id,
+                MonitoredProfile.adaptive_polling,
+                MonitoredProfile.check_interval_minutes
+            ).where(
+                MonitoredProfile.instagram_account_id.in_(account_ids),
+                MonitoredProfile.is_active == True
+            )
+        )
+        subscriptions = {}
+        for row in result.all():
+            subscriptions.setdefault(row.instagram_account_id, []).append({
+                "profile_id": row.id,
+                "user_id": row.user_id,
+                "adaptive_polling": row.adaptive_polling,
+                "check_interval_minutes": row.check_interval_minutes
+            })
+        return subscriptions
+
+    async def check_accounts(self, db: AsyncSession, account_ids: List[int]) -> Dict[str, Any]:
+        """Check a batch of accounts once and ingest new Reels for every subscriber
+
+        Database cost is constant per batch: one select for the accounts, one
+        for their subscriptions, one insert for all discovered Reels and one
+        bulk account update.
+        """
+        result = await db.execute(select(InstagramAccount).where(InstagramAccount.id.in_(account_ids)))
+        subscriptions = await self._load_subscriptions(db, account_ids)
+        # Accounts nobody follows any more are not scraped at all
+        accounts = {
+            account.id: account
+            for account in result.scalars().all()
+            if account.id in subscriptions
+        }
+
+        # Scrapes run concurrently on the bounded scrape executor
+        proxy_url = await instagram_service.get_working_proxy(db)
+        results = await asyncio.gather(*(
+            self.discover_reels(account, proxy_url) for account in accounts.values()
+        ))
+
+        # Collect cursor, user id and failure state changes for one bulk update
+        now = datetime.now(timezone.utc)
+        discoveries = {}
+        updates = {}
+        failed = {}
+        for account_id, discovery in zip(accounts.keys(), results):
+            account = accounts[account_id]
+            if discovery["instagram_user_id"] != account.instagram_user_id:
+                updates.setdefault(account_id, {"id": account_id})["instagram_user_id"] = discovery["instagram_user_id"]
+
+            if discovery["error"]:
+                failed[account_id] = discovery
+                continue
+
+            recovery = account_scheduler.recovery_update(account)
+            if recovery:
+                updates.setdefault(account_id, {"id": account_id}).update(recovery)
+
+            reels = discovery["reels"]
+            if not reels:
+                continue
+            discoveries[account_id] = reels
+            newest = max(reels, key=lambda reel: reel['taken_at_timestamp'])
+            updates.setdefault(account_id, {"id": account_id}).update({
+                "last_seen_reel_code": newest['id'],
+                "last_seen_taken_at": datetime.fromtimestamp(newest['taken_at_timestamp'], tz=timezone.utc)
+            })
+
+        # Accounts with adaptive subscribers get their interval re-estimated
+        adaptive = await account_scheduler.adaptive_updates(
+            db,
+            [account for account in accounts.values() if account.id not in failed],
+            subscriptions,
+            discoveries,
+            now
+        )
+        for account_id, values in adaptive.items():
+            updates.setdefault(account_id, {"id": account_id}).update(values)
+
+        # Profile errors back off exponentially and eventually quarantine the account;
+        # transient ones (proxy, timeouts, rate limits) only delay the next check
+        for account_id, discovery in failed.items():
+            account = accounts[account_id]
+            interval = account_scheduler.subscription_interval(account, subscriptions[account_id])
+            if discovery["profile_error"]:
+                values = account_scheduler.failure_update(account, interval, discovery["error"], now)
+            else:
+                values = account_scheduler.transient_failure_update(interval, discovery["error"], now)
+            updates.setdefault(account_id, {"id": account_id}).update(values)
+
+        if updates:
+            await db.execute(update(InstagramAccount), list(updates.values()))
+
+        # Profile errors reached Instagram, so only transient ones count against the proxy
+        if proxy_url and results:
+            transient = sum(1 for discovery in results if discovery["error"] and not discovery["profile_error"])
+            await instagram_service.record_proxy_results(db, {proxy_url: (len(results) - transient, transient)})
+
+        # Most polls find nothing new: stop before touching the posting table
+        if not discoveries:
+            if updates or (proxy_url and results):
+                await db.commit()
+            logger.info("No new reels", accounts_checked=len(accounts), accounts_failed=len(failed))
+            return {"status": "success", "accounts_checked": len(accounts), "accounts_failed": len(failed), "new_reels": []}
+
+        # Fan each account's new Reels out to every subscribing profile
+        profile_users = {}
+        profile_discoveries = {}
+        for account_id, reels in discoveries.items():
+            for sub in subscriptions[account_id]:
+                profile_users[sub["profile_id"]] = sub["user_id"]
+                profile_discoveries[sub["profile_id"]] = reels
+
+        inserted = await reel_ingestion_service.ingest(db, profile_discoveries)
+        new_reels = [
+            {"reel_id": row["id"], "user_id": profile_users[row["profile_id"]]}
+            for row in inserted
+        ]
+
+        logger.info(
+            "New reels discovered",
+            accounts_checked=len(accounts),
+            accounts_with_reels=len(discoveries),
+            accounts_failed=len(failed),
+            new_reels=len(new_reels)
+        )
+        return {"status": "success", "accounts_checked": len(accounts), "accounts_failed": len(failed), "new_reels": new_reels}
+
+    async def probe_quarantined(self, db: AsyncSession) -> Dict[str, Any]:
+        """Probe due quarantined accounts and bring reachable ones back"""
+        account_ids = await account_scheduler.claim_quarantined_accounts(db)
+        if not account_ids:
+            return {"status": "success", "probed": 0, "restored": 0}
+
+        result = await db.execute(select(InstagramAccount).where(InstagramAccount.id.in_(account_ids)))
+        accounts = result.scalars().all()
+
+        proxy_url = await instagram_service.get_working_proxy(db)
+        user_ids = await asyncio.gather(*(
+            instagram_service.probe_profile(account.username, proxy_url) for account in accounts
+        ))
+
+        restored = [
+            {
+                "id": account.id,
+                "instagram_user_id": user_id,
+                "consecutive_failures": 0,
+                "last_error": None,
+                "quarantined_at": None,
+                "next_check_at": datetime.now(timezone.utc)
+            }
+            for account, user_id in zip(accounts, user_ids)
+            if user_id
+        ]
+        if restored:
+            await db.execute(update(InstagramAccount), restored)
+            await db.commit()
+
+        logger.info("Quarantined accounts probed", probed=len(accounts), restored=len(restored))
+        return {"status": "success", "probed": len(accounts), "restored": len(restored)}
+
+# Global service instance
+monitoring_service = MonitoringService()
@@ -0,0 +1,155 @@
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+import httpx
+import structlog
+from app.core.config import settings
+from app.core.redis import get_async_redis
+
+logger = structlog.get_logger()
+
+# Grants a publish slot for one TikTok account, or returns how long until one
+# frees up. KEYS[1] is a sorted set of recent publishes scored by time,
+# KEYS[2] the account's cooldown key. ARGV: quota, window and spacing in
+# seconds, and the member recorded for a granted slot.
+RESERVE_SCRIPT = """
+local cooldown = redis.call('PTTL', KEYS[2])
+if cooldown > 0 then
+    return tostring(cooldown / 1000)
+end
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local quota = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local spacing = tonumber(ARGV[3])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window)
+local wait = 0
+if redis.call('ZCARD', KEYS[1]) >= quota then
+    local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+    wait = tonumber(oldest[2]) + window - now
+end
+local last = redis.call('ZRANGE', KEYS[1], -1, -1, 'WITHSCORES')
+if last[2] then
+    wait = math.max(wait, tonumber(last[2]) + spacing - now)
+end
+if wait > 0 then
+    return tostring(wait)
+end
+redis.call('ZADD', KEYS[1], now, ARGV[4])
+redis.call('EXPIRE', KEYS[1], math.ceil(window) + 60)
+return '0'
+"""
+
+# TikTok error codes that mean the account is posting too much right now
+QUOTA_ERROR_CODES = {"rate_limit_exceeded", "spam_risk_too_many_posts", "spam_risk_too_many_pending_share"}
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Cooldown TikTok asked for, if ``error`` is a rate-limit response
+
+    Honours ``Retry-After`` in seconds or as an HTTP date, and falls back to
+    ``PUBLISH_COOLDOWN_DEFAULT_SECONDS`` for quota errors without one.
+    """
+    if not isinstance(error, httpx.HTTPStatusError):
+        return None
+    response = error.response
+    try:
+        code = response.json().get("error", {}).get("code")
+    except ValueError:
+        code = None
+    if response.status_code != 429 and code not in QUOTA_ERROR_CODES:
+        return None
+
+    header = response.headers.get("Retry-After")
+    if header:
+        try:
+            return max(0.0, float(header))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, (parsedate_to_datetime(header) - datetime.now(timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            pass
+    return float(settings.PUBLISH_COOLDOWN_DEFAULT_SECONDS)
+
+class PublishScheduler:
+    """Paces publishes per TikTok account (``open_id``)
+
+    Every account gets at most ``PUBLISH_QUOTA_PER_ACCOUNT`` publishes per
+    rolling ``PUBLISH_QUOTA_WINDOW_SECONDS``, at least
+    ``PUBLISH_MIN_SPACING_SECONDS`` apart, and none while a cooldown TikTok
+    asked for with ``Retry-After`` is running. State lives in Redis so all
+    workers share it. ``reserve`` never sleeps: it says how long the caller
+    should come back after, so workers move on to accounts that can post.
+    """
+
+    def __init__(self, prefix: str = "publish"):
+        self.prefix = prefix
+        self._script = None
+
+    def _get_script(self):
+        if self._script is None:
+            self._script = get_async_redis().register_script(RESERVE_SCRIPT)
+        return self._script
+
+    def _recent_key(self, open_id: str) -> str:
+        return f"{self.prefix}:recent:{open_id}"
+
+    def _cooldown_key(self, open_id: str) -> str:
+        return f"{self.prefix}:cooldown:{open_id}"
+
+    async def reserve(self, open_id: str, member: str) -> float:
+        """Take a publish slot for ``member``; returns 0, or seconds until a slot frees up
+
+        Fails open if Redis is down.
+        """
+        try:
+            return float(await self._get_script()(
+                keys=[self._recent_key(open_id), self._cooldown_key(open_id)],
+                args=[
+                    settings.PUBLISH_QUOTA_PER_ACCOUNT,
+                    settings.PUBLISH_QUOTA_WINDOW_SECONDS,
+                    settings.PUBLISH_MIN_SPACING_SECONDS,
+                    member
+                ]
+            ))
+        except Exception as e:
+            logger.warning("Publish scheduler unavailable", open_id=open_id, error=str(e))
+            return 0.0
+
+    async def release(self, open_id: str, member: str):
+        """Give back a slot whose publish never reached TikTok or was rejected"""
+        try:
+            await get_async_redis().zrem(self._recent_key(open_id), member)
+        except Exception as e:
+            logger.warning("Failed to release publish slot", open_id=open_id, error=str(e))
+
+    async def cooldown(self, open_id: str, seconds: float):
+        """Hold every publish for this account for ``seconds``; never shortens a running cooldown"""
+        milliseconds = max(1, int(seconds * 1000))
+        key = self._cooldown_key(open_id)
+        try:
+            redis = get_async_redis()
+            if await redis.pttl(key) < milliseconds:
+                await redis.set(key, "1", px=milliseconds)
+            logger.warning("TikTok account cooling down", open_id=open_id, seconds=round(seconds, 1))
+        except Exception as e:
+            logger.warning("Failed to set publish cooldown", open_id=open_id, error=str(e))
+
+    async def usage(self, open_id: str) -> Dict[str, Any]:
+        """Publishes in the current window and remaining cooldown for an account"""
+        redis = get_async_redis()
+        now = datetime.now(timezone.utc).timestamp()
+        recent_key = self._recent_key(open_id)
+        await redis.zremrangebyscore(recent_key, "-inf", now - settings.PUBLISH_QUOTA_WINDOW_SECONDS)
+        used = await redis.zcard(recent_key)
+        cooldown_ms = await redis.pttl(self._cooldown_key(open_id))
+        return {
+            "open_id": open_id,
+            "used": used,
+            "quota": settings.PUBLISH_QUOTA_PER_ACCOUNT,
+            "window_seconds": settings.PUBLISH_QUOTA_WINDOW_SECONDS,
+            "cooldown_seconds": max(0, cooldown_ms) / 1000
+        }
+
+# Global scheduler instance
+publish_scheduler = PublishScheduler()
@@ -0,0 +1,683 @@
+import asyncio
+import random
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+import httpx
+from sqlalchemy import select, update, func, or_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+import structlog
+from app.core import mp4
+from app.core.config import settings
+from app.core.database import async_session_factory
+from app.models.monitored_profile import MonitoredProfile
+from app.models.posted_reel import PostedReel
+from app.models.publish_attempt import PublishAttempt
+from app.models.tiktok_credentials import TikTokCredentials
+from app.services.media_service import media_service
+from app.services.publish_scheduler import publish_scheduler, retry_after_seconds
+from app.services.reel_queue import reel_queue
+from app.services.tiktok_service import tiktok_service
+from app.services.tiktok_token_service import tiktok_token_service
+
+logger = structlog.get_logger()
+
+# TikTok's publish states that end tracking
+PUBLISH_COMPLETE = "PUBLISH_COMPLETE"
+PUBLISH_FAILED = "FAILED"
+TIKTOK_CAPTION_LIMIT = 2200
+
+# TikTok error codes worth another attempt later; any other 4xx is permanent
+RETRYABLE_ERROR_CODES = {
+    "rate_limit_exceeded",
+    "spam_risk_too_many_posts",
+    "spam_risk_too_many_pending_share",
+    "access_token_invalid",
+    "internal_error",
+}
+RETRYABLE_FAIL_REASONS = {"internal", "video_pull_failed"}
+
+# Reel statuses that close a publish attempt, and whether that failure was retryable
+RETRYABLE_OUTCOMES = {"downloaded": True, "dead_letter": True, "failed": False}
+
+def classify_error(error: Exception) -> Tuple[bool, str]:
+    """``(retryable, message)`` for an exception raised while publishing"""
+    message = f"{type(error).__name__}: {error}"
+    if isinstance(error, httpx.HTTPStatusError):
+        response = error.response
+        try:
+            code = response.json().get("error", {}).get("code")
+        except ValueError:
+            code = None
+        if code:
+            message = f"TikTok {response.status_code} {code}"
+        retryable = (
+            response.status_code in (401, 408, 429)
+            or response.status_code >= 500
+            or code in RETRYABLE_ERROR_CODES
+        )
+        return retryable, message
+    if isinstance(error, (httpx.TransportError, asyncio.TimeoutError, ConnectionError)):
+        return True, message
+    # Chunk uploads give up with RuntimeError after their own retries
+    return isinstance(error, RuntimeError), message
+
+class PublishingService:
+    """Starts TikTok publishes idempotently and tracks them to an outcome
+
+    ``publish`` leases a downloaded reel as ``posting`` through the reel
+    queue, records an attempt keyed on the reel code and TikTok ``open_id``,
+    uploads it and moves the reel to ``publishing`` without waiting for
+    TikTok to process it. The attempt key is unique among live and
+    successful attempts, so the same reel never reaches the same TikTok
+    account twice, whatever retries or duplicate tasks happen. The publish
+    scheduler gates every upload on the account's quota; throttled reels,
+    along with the rest of that account's queue, wait until it has capacity
+    without spending an attempt.
+
+    ``poll`` runs periodically: it checks every publish whose next check is
+    due in one concurrent batch and writes all outcomes in bulk. Retryable
+    failures go back to ``downloaded`` after a jittered exponential delay;
+    reels out of attempts land in ``dead_letter`` until requeued.
+    """
+
+    def next_check_delay(self, checks: int) -> timedelta:
+        """Exponential delay before the next status check"""
+        seconds = settings.PUBLISH_STATUS_INITIAL_DELAY_SECONDS * 2 ** checks
+        return timedelta(seconds=min(seconds, settings.PUBLISH_STATUS_MAX_DELAY_SECONDS))
+
+    def retry_delay(self, attempts: int) -> timedelta:
+        """Jittered exponential delay before the next publish attempt"""
+        base = settings.PUBLISH_RETRY_BASE_SECONDS
+        ceiling = min(settings.PUBLISH_RETRY_MAX_SECONDS, base * 2 ** attempts)
+        return timedelta(seconds=random.uniform(base, max(base, ceiling)))
+
+    def failure_update(self, attempts: int, retryable: bool, message: str, now: datetime) -> Dict[str, Any]:
+        """Reel columns after a failed attempt: retry later, dead-letter or fail"""
+        values = {"error_message": message[:1000], "lease_expires_at": None, "next_publish_check_at": None}
+        if not retryable:
+            values["status"] = "failed"
+        elif attempts >= settings.PUBLISH_MAX_ATTEMPTS:
+            values["status"] = "dead_letter"
+        else:
+            values["status"] = "downloaded"
+            values["next_attempt_at"] = now + self.retry_delay(attempts)
+        return values
+
+    def _upload_keeper(self, reel_id: int, attempt_id: int) -> Callable[[str, int], Awaitable[None]]:
+        """Upload progress callback that keeps the lease and the attempt alive
+
+        The ``publish_id`` is recorded on the attempt as soon as TikTok's
+        init call returns. After that the posting lease and the attempt's
+        heartbeat are renewed at most every third of the lease, in a session
+        of its own so the publishing session's pending state is left alone.
+        """
+        renew_every = settings.PUBLISH_LEASE_SECONDS / 3
+        last_renewed = time.monotonic()
+
+        async def on_progress(publish_id: str, uploaded: int):
+            nonlocal last_renewed
+            initialised = uploaded == 0
+            if not initialised and time.monotonic() - last_renewed < renew_every:
+                return
+            last_renewed = time.monotonic()
+            values = {"heartbeat_at": func.now()}
+            if initialised:
+                values["publish_id"] = publish_id
+            async with async_session_factory() as db:
+                await db.execute(update(PublishAttempt).where(PublishAttempt.id == attempt_id).values(**values))
+                if not await reel_queue.renew(db, reel_id, "posting", settings.PUBLISH_LEASE_SECONDS):
+                    logger.warning("Posting lease lost during upload", reel_id=reel_id, publish_id=publish_id)
+
+        return on_progress
+
+    async def _start_publish(
+        self, access_token: str, reel: PostedReel, caption: str, attempt_id: int
+    ) -> Dict[str, Any]:
+        """Let TikTok pull the file from our media endpoint when possible, else push it
+
+        Chunked uploads can outlast the posting lease, so they record their
+        ``publish_id`` up front and keep the lease and attempt alive as
+        chunks complete.
+        """
+        if reel.video_sha256 and await media_service.is_reachable():
+            response = await tiktok_service.post_video_direct(
+                access_token,
+                media_service.signed_url(reel.video_sha256),
+                caption=caption
+            )
+            return {"publish_id": response["data"]["publish_id"], "source": "PULL_FROM_URL"}
+
+        result = await tiktok_service.upload_video(
+            access_token, reel.video_file_path, caption=caption, on_progress=self._upload_keeper(reel.id, attempt_id)
+        )
+        return {"publish_id": result["publish_id"], "source": "FILE_UPLOAD"}
+
+    async def _fail(self, db: AsyncSession, reel: PostedReel, message: str) -> Dict[str, Any]:
+        reel.status = "failed"
+        reel.error_message = message[:1000]
+        reel.lease_expires_at = None
+        await db.commit()
+        return {"status": "error", "reel_id": reel.id, "message": reel.error_message}
+
+    async def _defer_account(self, db: AsyncSession, user_id: int, until: datetime):
+        """Push every queued reel of a TikTok account back until it can post again
+
+        Keeps the claim query from handing out reels the scheduler would
+        only turn away.
+        """
+        await db.execute(
+            update(PostedReel)
+            .where(
+                PostedReel.status == "downloaded",
+                PostedReel.profile_id.in_(
+                    select(MonitoredProfile.id).where(MonitoredProfile.user_id == user_id)
+                ),
+                or_(PostedReel.next_attempt_at.is_(None), PostedReel.next_attempt_at < until)
+            )
+            .values(next_attempt_at=until)
+            .execution_options(synchronize_session=False)
+        )
+
+    async def _begin_attempt(self, db: AsyncSession, reel: PostedReel, open_id: str) -> Optional[int]:
+        """Take the idempotency key for this reel and account; None if it is held
+
+        Attempts that never got a ``publish_id`` and whose heartbeat is older
+        than the posting lease belonged to a crashed worker and release the
+        key. Running uploads renew their heartbeat, so they keep it.
+        """
+        now = datetime.now(timezone.utc)
+        await db.execute(
+            update(PublishAttempt)
+            .where(
+                PublishAttempt.instagram_reel_code == reel.instagram_reel_code,
+                PublishAttempt.open_id == open_id,
+                PublishAttempt.outcome == "started",
+                PublishAttempt.publish_id.is_(None),
+                PublishAttempt.heartbeat_at < now - timedelta(seconds=settings.PUBLISH_LEASE_SECONDS)
+            )
+            .values(outcome="abandoned", finished_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        result = await db.execute(
+            insert(PublishAttempt)
+            .values(
+                reel_id=reel.id,
+                instagram_reel_code=reel.instagram_reel_code,
+                open_id=open_id,
+                attempt=reel.attempt_count + 1
+            )
+            .on_conflict_do_nothing(
+                index_elements=[PublishAttempt.instagram_reel_code, PublishAttempt.open_id],
+                index_where=PublishAttempt.outcome.in_(["started", "succeeded"])
+            )
+            .returning(PublishAttempt.id)
+        )
+        attempt_id = result.scalar_one_or_none()
+        if attempt_id is not None:
+            reel.attempt_count += 1
+        # Commit now so the key is held while the upload runs
+        await db.commit()
+        return attempt_id
+
+    async def _key_holder(self, db: AsyncSession, reel: PostedReel, open_id: str) -> Optional[PublishAttempt]:
+        result = await db.execute(
+            select(PublishAttempt)
+            .where(
+                PublishAttempt.instagram_reel_code == reel.instagram_reel_code,
+                PublishAttempt.open_id == open_id,
+                PublishAttempt.outcome.in_(["started", "succeeded"])
+            )
+        )
+        return result.scalars().first()
+
+    @staticmethod
+    def _is_orphaned(attempt: PublishAttempt, reel: PostedReel, now: datetime) -> bool:
+        """An attempt of this reel that reached TikTok but whose worker stopped reporting"""
+        stale_before = now - timedelta(seconds=settings.PUBLISH_LEASE_SECONDS)
+        return (
+            attempt.outcome == "started"
+            and attempt.reel_id == reel.id
+            and attempt.publish_id is not None
+            and attempt.heartbeat_at is not None
+            and attempt.heartbeat_at < stale_before
+        )
+
+    async def _publish_claimed(self, db: AsyncSession, reel_id: int, user_id: int) -> Dict[str, Any]:
+        """Upload a reel this worker holds the ``posting`` lease for"""
+        reel = await db.get(PostedReel, reel_id)
+        if not reel or reel.status != "posting":
+            return {"status": "skipped", "reel_id": reel_id}
+        if not reel.video_file_path:
+            return await self._fail(db, reel, "Video file missing")
+
+        credentials = await db.get(TikTokCredentials, user_id)
+        if not credentials:
+            return await self._fail(db, reel, "TikTok account not connected")
+
+        if not tiktok_token_service.is_usable(credentials):
+            # Never refresh inline: hand the reel back without spending an attempt
+            reel.status = "downloaded"
+            reel.next_attempt_at = datetime.now(timezone.utc) + timedelta(seconds=settings.TIKTOK_TOKEN_DEFER_SECONDS)
+            reel.lease_expires_at = None
+            await db.commit()
+            logger.info("Publish deferred until the TikTok token is refreshed", reel_id=reel_id, user_id=user_id)
+            return {"status": "deferred", "reel_id": reel_id, "user_id": user_id}
+
+        # Re-check the file right before spending upload bandwidth on it
+        info, rejection = await asyncio.to_thread(mp4.inspect, reel.video_file_path)
+        if rejection:
+            logger.warning("Reel rejected before upload", reel_id=reel_id, reason=rejection)
+            return await self._fail(db, reel, f"Invalid video: {rejection}")
+
+        # Publish only when the account has quota left; otherwise come back when it will
+        slot = f"reel:{reel.id}:{reel.attempt_count + 1}"
+        wait = await publish_scheduler.reserve(credentials.open_id, slot)
+        if wait > 0:
+            until = datetime.now(timezone.utc) + timedelta(seconds=wait)
+            await self._defer_account(db, user_id, until)
+            reel.status = "downloaded"
+            reel.next_attempt_at = until
+            reel.lease_expires_at = None
+            await db.commit()
+            logger.info("Publish throttled for TikTok account", reel_id=reel_id, user_id=user_id, wait=round(wait, 1))
+            return {"status": "throttled", "reel_id": reel_id, "user_id": user_id, "wait": wait}
+
+        attempt_id = await self._begin_attempt(db, reel, credentials.open_id)
+        if attempt_id is None:
+            await publish_scheduler.release(credentials.open_id, slot)
+            holder = await self._key_holder(db, reel, credentials.open_id)
+            now = datetime.now(timezone.utc)
+            outcome = holder.outcome if holder else None
+            if outcome == "succeeded":
+                reel.status = "duplicate"
+                reel.error_message = "Already published to this TikTok account"
+                reel.next_attempt_at = None
+            elif holder and self._is_orphaned(holder, reel, now):
+                # TikTok already has this publish: track it instead of uploading again
+                outcome = "adopted"
+                reel.status = "publishing"
+                reel.publish_id = holder.publish_id
+                reel.publish_checks = 0
+                reel.next_publish_check_at = now
+                reel.next_attempt_at = None
+            else:
+                # Another attempt for the same key is in flight: look again after it
+                reel.status = "downloaded"
+                reel.next_attempt_at = datetime.now(timezone.utc) + timedelta(seconds=settings.PUBLISH_LEASE_SECONDS)
+            reel.lease_expires_at = None
+            await db.commit()
+            logger.info("Publish skipped by idempotency key", reel_id=reel_id, holder=outcome)
+            if outcome == "adopted":
+                return {"status": "publishing", "reel_id": reel_id, "publish_id": reel.publish_id}
+            return {"status": "skipped", "reel_id": reel_id}
+
+        caption = (reel.caption or "")[:TIKTOK_CAPTION_LIMIT]
+        now = datetime.now(timezone.utc)
+        try:
+            result = await self._start_publish(credentials.access_token, reel, caption, attempt_id)
+        except Exception as e:
+            retryable, message = classify_error(e)
+            await db.execute(
+                update(PublishAttempt)
+                .where(PublishAttempt.id == attempt_id)
+                .values(
+                    outcome="failed",
+                    error_class="retryable" if retryable else "permanent",
+                    error_message=message[:1000],
+                    finished_at=now
+                )
+            )
+            # Rejected publishes do not use up quota
+            await publish_scheduler.release(credentials.open_id, slot)
+            cooldown = retry_after_seconds(e)
+            if cooldown is not None:
+                # A rate limit pauses the whole account; like a throttled reel,
+                # this one waits for capacity and gets its attempt back
+                await publish_scheduler.cooldown(credentials.open_id, cooldown)
+                until = now + timedelta(seconds=cooldown)
+                await self._defer_account(db, user_id, until)
+                reel.attempt_count -= 1
+                reel.status = "downloaded"
+                reel.next_attempt_at = until
+                reel.error_message = message[:1000]
+                reel.lease_expires_at = None
+                await db.commit()
+                logger.warning("Publish rate limited by TikTok", reel_id=reel_id, user_id=user_id, wait=round(cooldown, 1))
+                return {"status": "throttled", "reel_id": reel_id, "user_id": user_id, "wait": cooldown}
+
+            for column, value in self.failure_update(reel.attempt_count, retryable, message, now).items():
+                setattr(reel, column, value)
+            await db.commit()
+            logger.error("Error publishing reel", reel_id=reel_id, retryable=retryable, status=reel.status, error=message)
+            return {"status": "error", "reel_id": reel_id, "message": message, "retryable": retryable}
+
+        await db.execute(
+            update(PublishAttempt)
+            .where(PublishAttempt.id == attempt_id)
+            .values(publish_id=result["publish_id"], heartbeat_at=now)
+        )
+        reel.status = "publishing"
+        reel.publish_id = result["publish_id"]
+        reel.publish_checks = 0
+        reel.next_publish_check_at = now + self.next_check_delay(0)
+        reel.next_attempt_at = None
+        reel.lease_expires_at = None
+        reel.error_message = None
+        await db.commit()
+
+        logger.info("Reel publish started", reel_id=reel_id, publish_id=reel.publish_id, source=result["source"])
+        return {"status": "publishing", "reel_id": reel_id, "publish_id": reel.publish_id}
+
+    async def publish(self, db: AsyncSession, reel_id: int, user_id: int) -> Dict[str, Any]:
+        """Claim one downloaded reel and start its TikTok publish
+
+        The claim stops concurrent duplicates of the same task; the attempt
+        key stops re-publishing across retries and across profiles of the
+        same TikTok account.
+        """
+        claimed = await reel_queue.claim(
+            db, "downloaded", "posting", settings.PUBLISH_LEASE_SECONDS, reel_ids=[reel_id]
+        )
+        if not claimed:
+            return {"status": "skipped", "reel_id": reel_id}
+        return await self._publish_claimed(db, reel_id, user_id)
+
+    async def _claim_next(self, db: AsyncSession, count: int) -> List[Tuple[int, int]]:
+        """Lease the next ``count`` downloaded reels as ``(reel_id, user_id)`` pairs, in claim order"""
+        reel_ids = await reel_queue.claim(db, "downloaded", "posting", settings.PUBLISH_LEASE_SECONDS, limit=count)
+        if not reel_ids:
+            return []
+        result = await db.execute(
+            select(PostedReel.id, MonitoredProfile.user_id)
+            .join(MonitoredProfile, PostedReel.profile_id == MonitoredProfile.id)
+            .where(PostedReel.id.in_(reel_ids))
+        )
+        user_ids = dict(result.all())
+        return [(reel_id, user_ids[reel_id]) for reel_id in reel_ids]
+
+    async def publish_ready(self, limit: Optional[int] = None) -> Dict[str, Any]:
+        """Publish up to ``limit`` downloaded reels, ``PUBLISH_MAX_IN_FLIGHT`` at a time
+
+        Slots claim work only once they are free, so a lease starts when its
+        upload does instead of while it waits for a slot. Free slots share
+        one fair claim: whoever refills claims a reel for every slot waiting
+        at that moment. Any number of workers can run this at once; SKIP
+        LOCKED hands each of them different reels.
+        """
+        budget = limit or settings.PUBLISH_CLAIM_BATCH_SIZE
+        results: List[Dict[str, Any]] = []
+        ready: Deque[Tuple[int, int]] = deque()
+        refill = asyncio.Lock()
+        waiting = 0
+
+        async def next_reel() -> Optional[Tuple[int, int]]:
+            nonlocal budget, waiting
+            waiting += 1
+            try:
+                # Let the other free slots line up so one claim serves them all
+                await asyncio.sleep(0)
+                async with refill:
+                    if not ready and budget > 0:
+                        count = min(budget, waiting)
+                        async with async_session_factory() as db:
+                            claimed = await self._claim_next(db, count)
+                        # A short claim means the queue is drained
+                        budget = budget - count if len(claimed) == count else 0
+                        ready.extend(claimed)
+                    return ready.popleft() if ready else None
+            finally:
+                waiting -= 1
+
+        async def slot():
+            while True:
+                claimed = await next_reel()
+                if claimed is None:
+                    return
+                # One session per publish: sessions cannot be shared across tasks
+                async with async_session_factory() as db:
+                    results.append(await self._publish_claimed(db, *claimed))
+
+        await asyncio.gather(*(slot() for _ in range(min(budget, settings.PUBLISH_MAX_IN_FLIGHT))))
+
+        publishing = sum(1 for result in results if result["status"] == "publishing")
+        throttled = sum(1 for result in results if result["status"] == "throttled")
+        stale_tokens = sorted({result["user_id"] for result in results if result["status"] == "deferred"})
+        logger.info(
+            "Ready reels published",
+            claimed=len(results),
+            publishing=publishing,
+            throttled=throttled,
+            deferred=len(stale_tokens)
+        )
+        return {
+            "status": "success",
+            "claimed": len(results),
+            "publishing": publishing,
+            "throttled": throttled,
+            "stale_token_user_ids": stale_tokens
+        }
+
+    async def _check(self, semaphore: asyncio.Semaphore, access_token: str, publish_id: str) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                response = await tiktok_service.check_post_status(access_token, publish_id)
+                return response.get("data") or {}
+            except Exception as e:
+                return {"error": f"{type(e).__name__}: {e}"}
+
+    def _outcome(self, row, data: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+        """Column updates for one publish given TikTok's status payload"""
+        status = data.get("status")
+        if status == PUBLISH_COMPLETE:
+            post_ids = data.get("publicaly_available_post_id") or []
+            return {
+                "id": row.id,
+                "status": "posted",
+                "tiktok_post_id": str(post_ids[0]) if post_ids else None,
+                "posted_at": now,
+                "next_publish_check_at": None,
+                "error_message": None
+            }
+        if status == PUBLISH_FAILED:
+            reason = data.get("fail_reason") or "Publish failed"
+            return {
+                "id": row.id,
+                **self.failure_update(row.attempt_count, reason in RETRYABLE_FAIL_REASONS, reason, now)
+            }
+
+        checks = row.publish_checks + 1
+        if checks >= settings.PUBLISH_STATUS_MAX_CHECKS:
+            return {
+                "id": row.id,
+                "status": "failed",
+                "publish_checks": checks,
+                "next_publish_check_at": None,
+                "error_message": "Publish status not final after maximum checks"
+            }
+
+        # Still processing (or the check itself failed): look again later
+        values = {
+            "id": row.id,
+            "publish_checks": checks,
+            "next_publish_check_at": now + self.next_check_delay(checks)
+        }
+        if data.get("error"):
+            values["error_message"] = data["error"][:1000]
+        return values
+
+    async def _close_attempts(self, db: AsyncSession, rows, updates: List[Dict[str, Any]], now: datetime):
+        """Close the attempts whose publish reached a final state, one statement per outcome"""
+        publish_ids = {row.id: row.publish_id for row in rows}
+        closed = {"succeeded": [], "retryable": [], "permanent": []}
+        for values in updates:
+            status = values.get("status")
+            if status == "posted":
+                closed["succeeded"].append(publish_ids[values["id"]])
+            elif status in RETRYABLE_OUTCOMES:
+                key = "retryable" if RETRYABLE_OUTCOMES[status] else "permanent"
+                closed[key].append(publish_ids[values["id"]])
+
+        for key, ids in closed.items():
+            if not ids:
+                continue
+            values = {"outcome": "succeeded", "finished_at": now} if key == "succeeded" else {
+                "outcome": "failed", "error_class": key, "finished_at": now
+            }
+            await db.execute(
+                update(PublishAttempt)
+                .where(PublishAttempt.publish_id.in_(ids))
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+
+    async def _claim_checks(self, db: AsyncSession, limit: int) -> List[int]:
+        """Take due publishes for this poll by pushing their next check past it
+
+        SKIP LOCKED keeps overlapping polls from checking the same publish.
+        """
+        due = (
+            select(PostedReel.id)
+            .where(
+                PostedReel.status == "publishing",
+                PostedReel.next_publish_check_at <= func.now()
+            )
+            .order_by(PostedReel.next_publish_check_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        result = await db.execute(
+            update(PostedReel)
+            .where(PostedReel.id.in_(due.scalar_subquery()))
+            .values(next_publish_check_at=func.now() + timedelta(seconds=settings.PUBLISH_POLL_CLAIM_SECONDS))
+            .returning(PostedReel.id)
+            .execution_options(synchronize_session=False)
+        )
+        reel_ids = list(result.scalars().all())
+        await db.commit()
+        return reel_ids
+
+    async def poll(self, db: AsyncSession, limit: Optional[int] = None) -> Dict[str, Any]:
+        """Check every due in-flight publish concurrently and record the outcomes
+
+        The batch is claimed before any request goes out, and outcomes are
+        only written to publishes that are still the ones checked: reels
+        that left ``publishing`` meanwhile are left alone.
+        """
+        reel_ids = await self._claim_checks(db, limit or settings.PUBLISH_POLL_BATCH_SIZE)
+        if not reel_ids:
+            return {"status": "success", "checked": 0, "posted": 0, "retry": 0, "failed": 0}
+
+        result = await db.execute(
+            select(
+                PostedReel.id,
+                PostedReel.publish_id,
+                PostedReel.publish_checks,
+                PostedReel.attempt_count,
+                TikTokCredentials.access_token
+            )
+            .join(MonitoredProfile, PostedReel.profile_id == MonitoredProfile.id)
+            .join(TikTokCredentials, TikTokCredentials.user_id == MonitoredProfile.user_id)
+            .where(PostedReel.id.in_(reel_ids))
+        )
+        rows = result.all()
+        # Close the read-only transaction so no connection idles during the checks
+        await db.commit()
+        if not rows:
+            return {"status": "success", "checked": 0, "posted": 0, "retry": 0, "failed": 0}
+
+        semaphore = asyncio.Semaphore(settings.PUBLISH_POLL_CONCURRENCY)
+        payloads = await asyncio.gather(*(
+            self._check(semaphore, row.access_token, row.publish_id) for row in rows
+        ))
+
+        # Lock what is still publishing the same publish_id; everything else moved on
+        now = datetime.now(timezone.utc)
+        current = await db.execute(
+            select(PostedReel.id, PostedReel.publish_id)
+            .where(PostedReel.id.in_([row.id for row in rows]), PostedReel.status == "publishing")
+            .with_for_update()
+        )
+        current = dict(current.all())
+        checked = [
+            (row, data) for row, data in zip(rows, payloads)
+            if current.get(row.id) == row.publish_id
+        ]
+        rows = [row for row, _ in checked]
+        if not rows:
+            await db.commit()
+            return {"status": "success", "checked": 0, "posted": 0, "retry": 0, "failed": 0}
+
+        updates: List[Dict[str, Any]] = [
+            self._outcome(row, data, now) for row, data in checked
+        ]
+        await db.execute(update(PostedReel), updates)
+        await self._close_attempts(db, rows, updates, now)
+        await db.commit()
+
+        posted = sum(1 for values in updates if values.get("status") == "posted")
+        retry = sum(1 for values in updates if values.get("status") == "downloaded")
+        failed = sum(1 for values in updates if values.get("status") in ("failed", "dead_letter"))
+        logger.info("Publish statuses checked", checked=len(rows), posted=posted, retry=retry, failed=failed)
+        return {"status": "success", "checked": len(rows), "posted": posted, "retry": retry, "failed": failed}
+
+    @staticmethod
+    def _dead_letter_conditions(reel_ids: Optional[List[int]], user_id: Optional[int]) -> list:
+        conditions = [PostedReel.status == "dead_letter"]
+        if reel_ids is not None:
+            conditions.append(PostedReel.id.in_(reel_ids))
+        if user_id is not None:
+            conditions.append(PostedReel.profile_id.in_(
+                select(MonitoredProfile.id).where(MonitoredProfile.user_id == user_id)
+            ))
+        return conditions
+
+    async def requeue_dead_letter(
+        self,
+        db: AsyncSession,
+        reel_ids: Optional[List[int]] = None,
+        user_id: Optional[int] = None
+    ) -> List[int]:
+        """Give dead-lettered reels a fresh set of attempts, in one statement
+
+        Reels restart from ``pending`` so the download stage re-checks the
+        video, reusing the stored copy; storage keeps it while the reel is
+        dead-lettered. Returns the requeued ids.
+        """
+        result = await db.execute(
+            update(PostedReel)
+            .where(*self._dead_letter_conditions(reel_ids, user_id))
+            .values(status="pending", attempt_count=0, next_attempt_at=None, error_message=None)
+            .returning(PostedReel.id)
+            .execution_options(synchronize_session=False)
+        )
+        requeued = list(result.scalars().all())
+        await db.commit()
+
+        logger.info("Dead-letter reels requeued", count=len(requeued))
+        return requeued
+
+    async def discard_dead_letter(
+        self,
+        db: AsyncSession,
+        reel_ids: Optional[List[int]] = None,
+        user_id: Optional[int] = None
+    ) -> List[int]:
+        """Give up on dead-lettered reels so storage may evict their videos"""
+        result = await db.execute(
+            update(PostedReel)
+            .where(*self._dead_letter_conditions(reel_ids, user_id))
+            .values(status="discarded", next_attempt_at=None)
+            .returning(PostedReel.id)
+            .execution_options(synchronize_session=False)
+        )
+        discarded = list(result.scalars().all())
+        await db.commit()
+
+        logger.info("Dead-letter reels discarded", count=len(discarded))
+        return discarded
+
+# Global service instance
+publishing_service = PublishingService()
@@ -0,0 +1,199 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+from sqlalchemy import select, update, or_, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+import structlog
+from app.core import mp4
+from app.core.config import settings
+from app.core.database import async_session_factory
+from app.models.monitored_profile import MonitoredProfile
+from app.models.posted_reel import PostedReel
+from app.services.instagram_service import instagram_service
+from app.services.reel_queue import reel_queue
+from app.services.video_store import video_store
+
+logger = structlog.get_logger()
+
+class ReelDownloadService:
+    """Download stage between discovery and posting
+
+    Freshly ingested reels are ``pending``. This stage leases them through
+    the reel queue as ``downloading``, brings their video into the local store while
+    Instagram's signed URL is still valid, checks the MP4 container and
+    marks them ``downloaded``. Only ``downloaded`` reels are handed to the
+    posting stage; videos TikTok would reject fail here, before any upload.
+    """
+
+    @staticmethod
+    def metadata_columns(info) -> Dict[str, Any]:
+        """PostedReel columns for the container metadata of a probed video"""
+        return {
+            "video_size_bytes": info["size"],
+            "video_duration_seconds": info["duration"],
+            "video_width": info["width"],
+            "video_height": info["height"],
+            "video_codec": info["video_codec"],
+            "video_moov_offset": info["moov_offset"]
+        }
+
+    async def _claim(self, db: AsyncSession, reel_ids: List[int]) -> List[PostedReel]:
+        """Lease the given pending reels as ``downloading`` and load them"""
+        claimed = await reel_queue.claim(
+            db, "pending", "downloading", settings.DOWNLOAD_LEASE_SECONDS, reel_ids=reel_ids
+        )
+        if not claimed:
+            return []
+
+        result = await db.execute(select(PostedReel).where(PostedReel.id.in_(claimed)))
+        return list(result.scalars().all())
+
+    async def _keep_leases(self, reel_ids: List[int]):
+        """Renew the batch's ``downloading`` leases until cancelled
+
+        Transfers and retries can outlast the lease the batch was claimed
+        with; without renewal the sweep would hand the same reels to a second
+        worker while the first is still writing their files. Runs in a
+        session of its own, the batch's session is idle during transfers.
+        """
+        while True:
+            await asyncio.sleep(settings.DOWNLOAD_LEASE_SECONDS / 3)
+            try:
+                async with async_session_factory() as db:
+                    await reel_queue.renew_many(db, reel_ids, "downloading", settings.DOWNLOAD_LEASE_SECONDS)
+            except Exception as e:
+                logger.warning("Failed to renew download leases", reels=len(reel_ids), error=str(e))
+
+    async def download_reels(self, db: AsyncSession, reel_ids: List[int]) -> Dict[str, Any]:
+        """Download a batch of reels with a bounded number of transfers in flight
+
+        Each Instagram media code is transferred at most once per batch: reels
+        sharing a code (the same reel fanned out to several subscribers) get
+        the result of a single download, and codes whose video another reel
+        already stored are reused without any transfer. Returns the reels
+        that are ready to post as ``{"reel_id", "user_id"}`` dicts together
+        with counters.
+        """
+        reels = await self._claim(db, reel_ids)
+        if not reels:
+            return {"status": "success", "downloaded": [], "failed": 0, "retry": 0}
+
+        by_code: Dict[str, List[PostedReel]] = {}
+        for reel in reels:
+            by_code.setdefault(reel.instagram_reel_code, []).append(reel)
+        codes = list(by_code)
+
+        stored = await video_store.lookup_many(db, codes)
+        proxy_url = await instagram_service.get_working_proxy(db)
+        semaphore = asyncio.Semaphore(settings.DOWNLOAD_MAX_IN_FLIGHT)
+
+        async def fetch(reel_code: str) -> Dict[str, Any]:
+            if reel_code in stored:
+                return {"success": True, "cached": True, **stored[reel_code]}
+            async with semaphore:
+                return await video_store.download(by_code[reel_code][0], proxy_url)
+
+        # No database access while transfers run, the session is not shared
+        keeper = asyncio.create_task(self._keep_leases([reel.id for reel in reels]))
+        try:
+            results = await asyncio.gather(*(fetch(reel_code) for reel_code in codes))
+        finally:
+            keeper.cancel()
+
+        async def inspect(result: Dict[str, Any]):
+            if not result["success"]:
+                return None, None
+            return await asyncio.to_thread(mp4.inspect, result["path"])
+
+        # Container checks read only box headers, so they run for every file
+        inspections = await asyncio.gather(*(inspect(result) for result in results))
+
+        outcomes = dict(zip(codes, zip(results, inspections)))
+
+        updates = []
+        ready_ids = []
+        failed = 0
+        retry = 0
+        for reel in reels:
+            result, (info, rejection) = outcomes[reel.instagram_reel_code]
+            if result["success"] and rejection:
+                failed += 1
+                updates.append({
+                    "id": reel.id,
+                    "status": "failed",
+                    "video_sha256": result["sha256"],
+                    "error_message": f"Invalid video: {rejection}",
+                    "lease_expires_at": None
+                })
+            elif result["success"]:
+                ready_ids.append(reel.id)
+                updates.append({
+                    "id": reel.id,
+                    "status": "downloaded",
+                    "video_file_path": result["path"],
+                    "video_sha256": result["sha256"],
+                    "error_message": None,
+                    "lease_expires_at": None,
+                    **self.metadata_columns(info)
+                })
+            elif result.get("resumable"):
+                # Transient failure: back to pending, the sweep picks it up again
+                retry += 1
+                updates.append({
+                    "id": reel.id, "status": "pending", "error_message": result["error"], "lease_expires_at": None
+                })
+            else:
+                failed += 1
+                updates.append({
+                    "id": reel.id, "status": "failed", "error_message": result["error"], "lease_expires_at": None
+                })
+
+        await db.execute(update(PostedReel), updates)
+        await db.commit()
+
+        transfers = sum(1 for result in results if not result.get("cached"))
+        downloaded = []
+        if ready_ids:
+            result = await db.execute(
+                select(PostedReel.id, MonitoredProfile.user_id)
+                .join(MonitoredProfile, PostedReel.profile_id == MonitoredProfile.id)
+                .where(PostedReel.id.in_(ready_ids))
+            )
+            downloaded = [{"reel_id": reel_id, "user_id": user_id} for reel_id, user_id in result.all()]
+
+        logger.info(
+            "Reel downloads completed",
+            claimed=len(reels),
+            downloaded=len(downloaded),
+            transfers=transfers,
+            reused=len(reels) - transfers,
+            retry=retry,
+            failed=failed
+        )
+        return {"status": "success", "downloaded": downloaded, "failed": failed, "retry": retry}
+
+    async def stalled_reel_ids(self, db: AsyncSession, limit: Optional[int] = None) -> List[int]:
+        """Pending reels whose download never started or failed transiently
+
+        Leases of workers that died are released first, which puts their
+        reels back in ``pending`` (or ``downloaded``, for posting leases).
+        """
+        await reel_queue.release_expired(db)
+
+        cutoff = datetime.now(timezone.utc) - timedelta(minutes=settings.DOWNLOAD_RETRY_AFTER_MINUTES)
+        result = await db.execute(
+            select(PostedReel.id)
+            .where(
+                PostedReel.status == "pending",
+                or_(
+                    PostedReel.updated_at < cutoff,
+                    and_(PostedReel.updated_at.is_(None), PostedReel.created_at < cutoff)
+                )
+            )
+            .order_by(PostedReel.created_at)
+            .limit(limit or settings.DOWNLOAD_SWEEP_LIMIT)
+        )
+        return list(result.scalars().all())
+
+# Global service instance
+reel_download_service = ReelDownloadService()
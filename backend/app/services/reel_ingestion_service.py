@@ -0,0 +1,50 @@
+from typing import Dict, List, Any
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+import structlog
+from app.models.posted_reel import PostedReel
+
+logger = structlog.get_logger()
+
+class ReelIngestionService:
+    """Bulk dedup and insert of newly discovered Reels"""
+
+    async def ingest(self, db: AsyncSession, discoveries: Dict[int, List[Dict[str, Any]]]) -> List[Dict[str, int]]:
+        """Insert discovered Reels for many profiles in a single statement
+
+        ``discoveries`` maps a profile id to the reel dicts returned by
+        ``InstagramService.get_recent_reels``. Reels a profile already has in
+        ``posted_reels`` are skipped by the unique index on
+        ``(profile_id, instagram_reel_code)``; only the rows actually inserted
+        are returned, as ``{"id": ..., "profile_id": ...}`` dicts.
+        """
+        rows = {}
+        for profile_id, reels in discoveries.items():
+            for reel in reels:
+                # The same code can show up twice in one batch, keep the first
+                rows.setdefault((profile_id, reel['id']), {
+                    "profile_id": profile_id,
+                    "instagram_reel_code": reel['id'],
+                    "instagram_reel_url": reel['url'],
+                    "instagram_video_url": reel['video_url'],
+                    "caption": reel['caption'],
+                    "status": "pending"
+                })
+
+        if not rows:
+            return []
+
+        result = await db.execute(
+            insert(PostedReel)
+            .values(list(rows.values()))
+            .on_conflict_do_nothing(index_elements=[PostedReel.profile_id, PostedReel.instagram_reel_code])
+            .returning(PostedReel.id, PostedReel.profile_id)
+        )
+        inserted = [{"id": row.id, "profile_id": row.profile_id} for row in result.all()]
+        await db.commit()
+
+        logger.info("Reels ingested", candidates=len(rows), inserted=len(inserted))
+        return inserted
+
+# Global service instance
+reel_ingestion_service = ReelIngestionService()
@@ -0,0 +1,159 @@
+from datetime import timedelta
+from typing import Dict, List, Optional
+from sqlalchemy import select, update, func, case, or_, exists, true
+from sqlalchemy.ext.asyncio import AsyncSession
+import structlog
+from app.core.config import settings
+from app.models.monitored_profile import MonitoredProfile
+from app.models.posted_reel import PostedReel
+
+logger = structlog.get_logger()
+
+# In-progress status -> the queued status it returns to when its lease expires
+LEASED_STATUSES: Dict[str, str] = {
+    "downloading": "pending",
+    "posting": "downloaded",
+}
+
+class ReelQueue:
+    """Work queue on top of ``posted_reels.status``
+
+    A worker claims rows by moving them from a queued status to an
+    in-progress one inside a single ``UPDATE ... WHERE id IN (SELECT ... FOR
+    UPDATE SKIP LOCKED LIMIT n)``, so concurrent workers never claim the same
+    reel and never wait on each other's locks. Every claim carries a lease;
+    a worker that crashes simply lets it expire and ``release_expired`` puts
+    the row back in its queue. Batches are taken round-robin by tenant
+    (``user_id``), so one tenant's backlog never starves the others.
+    """
+
+    async def claim(
+        self,
+        db: AsyncSession,
+        from_status: str,
+        to_status: str,
+        lease_seconds: int,
+        limit: Optional[int] = None,
+        reel_ids: Optional[List[int]] = None
+    ) -> List[int]:
+        """Claim up to ``limit`` reels, or the claimable ones among ``reel_ids``
+
+        Batch claims go round-robin by tenant: every tenant's oldest reel
+        comes first, then every tenant's second oldest, and so on. Only
+        profiles with queued reels take part (an EXISTS probe on the queue's
+        partial index), and each contributes its oldest
+        ``max(limit, REEL_QUEUE_TENANT_WINDOW)`` reels through a LATERAL
+        scan of ``(profile_id, created_at)``; a tenant's oldest reels are
+        always among its profiles' oldest. A claim therefore reads about
+        window x queued profiles rows, not whole backlogs. The window is
+        wider than the batch so concurrent claimers still find unlocked
+        rows. Reels waiting out a retry delay (``next_attempt_at`` in the
+        future) are not claimable yet.
+        """
+        now = func.now()
+        eligible = [
+            PostedReel.status == from_status,
+            or_(PostedReel.next_attempt_at.is_(None), PostedReel.next_attempt_at <= now)
+        ]
+
+        if reel_ids is not None or limit is None:
+            # Specific reels: nothing to be fair about
+            candidates = (
+                select(PostedReel.id)
+                .where(*eligible)
+                .order_by(PostedReel.created_at)
+                .with_for_update(skip_locked=True)
+            )
+            if reel_ids is not None:
+                candidates = candidates.where(PostedReel.id.in_(reel_ids))
+            if limit is not None:
+                candidates = candidates.limit(limit)
+        else:
+            queued = (
+                select(MonitoredProfile.id.label("profile_id"), MonitoredProfile.user_id)
+                .where(exists().where(PostedReel.profile_id == MonitoredProfile.id, *eligible))
+                .subquery("queued")
+            )
+            oldest = (
+                select(PostedReel.id.label("reel_id"), PostedReel.created_at.label("created_at"))
+                .where(PostedReel.profile_id == queued.c.profile_id, *eligible)
+                .order_by(PostedReel.created_at)
+                .limit(max(limit, settings.REEL_QUEUE_TENANT_WINDOW))
+                .lateral("oldest")
+            )
+            turns = (
+                select(
+                    oldest.c.reel_id,
+                    func.row_number()
+                    .over(partition_by=queued.c.user_id, order_by=oldest.c.created_at)
+                    .label("turn")
+                )
+                .select_from(queued.join(oldest, true()))
+                .subquery("turns")
+            )
+            candidates = (
+                select(PostedReel.id)
+                .join(turns, turns.c.reel_id == PostedReel.id)
+                .order_by(turns.c.turn, PostedReel.created_at)
+                .limit(limit)
+                .with_for_update(skip_locked=True, of=PostedReel)
+            )
+
+        result = await db.execute(
+            update(PostedReel)
+            .where(PostedReel.id.in_(candidates.scalar_subquery()))
+            .values(
+                status=to_status,
+                claimed_at=now,
+                lease_expires_at=now + timedelta(seconds=lease_seconds)
+            )
+            .returning(PostedReel.id)
+            .execution_options(synchronize_session=False)
+        )
+        claimed = list(result.scalars().all())
+        await db.commit()
+        return claimed
+
+    async def renew(self, db: AsyncSession, reel_id: int, status: str, lease_seconds: int) -> bool:
+        """Extend the lease on a reel still held in ``status``; False if it was lost"""
+        return bool(await self.renew_many(db, [reel_id], status, lease_seconds))
+
+    async def renew_many(self, db: AsyncSession, reel_ids: List[int], status: str, lease_seconds: int) -> int:
+        """Extend the leases on the given reels still held in ``status``; returns how many"""
+        result = await db.execute(
+            update(PostedReel)
+            .where(PostedReel.id.in_(reel_ids), PostedReel.status == status)
+            .values(lease_expires_at=func.now() + timedelta(seconds=lease_seconds))
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        return result.rowcount
+
+    async def release_expired(self, db: AsyncSession) -> int:
+        """Return reels whose lease ran out to the status they were claimed from
+
+        Work that is still running keeps renewing its lease, which keeps
+        ``lease_expires_at`` in the future and the row out of this update.
+        """
+        result = await db.execute(
+            update(PostedReel)
+            .where(
+                PostedReel.status.in_(list(LEASED_STATUSES)),
+                PostedReel.lease_expires_at < func.now()
+            )
+            .values(
+                status=case(
+                    *((PostedReel.status == leased, queued) for leased, queued in LEASED_STATUSES.items())
+                ),
+                lease_expires_at=None
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+
+        if result.rowcount:
+            logger.warning("Expired reel leases released", count=result.rowcount)
+        return result.rowcount
+
+# Global queue instance
+reel_queue = ReelQueue()
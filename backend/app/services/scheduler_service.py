@@ -0,0 +1,358 @@
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from sqlalchemy import select, update, func, case, and_, literal
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+import structlog
+from app.core.config import settings
+from app.models.instagram_account import InstagramAccount
+from app.models.monitored_profile import MonitoredProfile
+from app.models.posted_reel import PostedReel
+
+logger = structlog.get_logger()
+
+def normalize_username(username):
+    """Strip the leading '@' and lowercase (works on strings and SQL columns)"""
+    if isinstance(username, str):
+        return username.lstrip("@").lower()
+    return func.lower(func.ltrim(username, "@"))
+
+class AccountScheduler:
+    """Due-time scheduler for shared Instagram accounts
+
+    Every account carries a ``next_check_at`` timestamp. A sweep only touches
+    rows that are due, walking a partial index on ``next_check_at``, so its
+    cost grows with the number of due accounts rather than the table size.
+    An account's interval is the shortest one among its active subscriptions.
+    """
+
+    def __init__(self):
+        self.max_due_per_sweep = settings.MONITOR_MAX_DUE_PER_SWEEP
+        self.min_interval = settings.ADAPTIVE_MIN_INTERVAL_MINUTES
+        self.max_interval = settings.ADAPTIVE_MAX_INTERVAL_MINUTES
+
+    def interval_expression(self):
+        """SQL expression for an account's current polling interval in minutes
+
+        Accounts without active subscriptions are pushed out by the maximum
+        interval, so they cost almost nothing until someone subscribes again.
+        """
+        subscription_interval = case(
+            (
+                MonitoredProfile.adaptive_polling == True,
+                func.coalesce(InstagramAccount.effective_interval_minutes, MonitoredProfile.check_interval_minutes)
+            ),
+            else_=MonitoredProfile.check_interval_minutes
+        )
+        shortest = (
+            select(func.min(subscription_interval))
+            .where(
+                MonitoredProfile.instagram_account_id == InstagramAccount.id,
+                MonitoredProfile.is_active == True
+            )
+            .correlate(InstagramAccount)
+            .scalar_subquery()
+        )
+        return func.coalesce(shortest, self.max_interval)
+
+    def subscription_interval(self, account: InstagramAccount, subscriptions: List[Dict[str, Any]]) -> int:
+        """Python counterpart of ``interval_expression`` for loaded subscriptions"""
+        intervals = [
+            account.effective_interval_minutes
+            if sub["adaptive_polling"] and account.effective_interval_minutes
+            else sub["check_interval_minutes"] or 60
+            for sub in subscriptions
+        ]
+        return min(intervals) if intervals else self.max_interval
+
+    def estimate_interval(self, post_times: List[datetime], now: datetime) -> int:
+        """Estimate a polling interval from an account's posting history
+
+        The interval is sized so that a check finds about
+        ``ADAPTIVE_TARGET_POSTS_PER_CHECK`` new posts on average, then scaled by
+        how active the upcoming hours of the day have been historically.
+        """
+        window = timedelta(days=settings.ADAPTIVE_WINDOW_DAYS)
+        recent = [t for t in post_times if timedelta(0) <= now - t <= window]
+        if not recent:
+            return self.max_interval
+
+        posts_per_hour = len(recent) / (window.total_seconds() / 3600)
+        interval_hours = settings.ADAPTIVE_TARGET_POSTS_PER_CHECK / posts_per_hour
+
+        # Time-of-day pattern (UTC), smoothed so quiet hours are not ignored
+        hourly = [0] * 24
+        for t in recent:
+            hourly[t.hour] += 1
+        span = min(24, max(1, round(interval_hours)))
+        upcoming = sum(hourly[(now.hour + i) % 24] for i in range(span)) / span
+        average = len(recent) / 24
+        interval_hours /= (upcoming + 1) / (average + 1)
+
+        return int(min(self.max_interval, max(self.min_interval, interval_hours * 60)))
+
+    async def adaptive_updates(
+        self,
+        db: AsyncSession,
+        accounts: List[InstagramAccount],
+        subscriptions: Dict[int, List[Dict[str, Any]]],
+        discoveries: Dict[int, List[Dict[str, Any]]],
+        now: datetime
+    ) -> Dict[int, Dict[str, Any]]:
+        """Recompute intervals for accounts with adaptive subscriptions after a check
+
+        Posting history is the first time each reel code reached
+        ``posted_reels`` for the account, plus the ``taken_at`` of Reels
+        discovered in this check, in one query per batch. Returns per-account
+        column updates, including the rescheduled ``next_check_at``.
+        """
+        adaptive_ids = [
+            account.id for account in accounts
+            if any(sub["adaptive_polling"] for sub in subscriptions.get(account.id, []))
+        ]
+        if not adaptive_ids:
+            return {}
+
+        result = await db.execute(
+            select(MonitoredProfile.instagram_account_id, func.min(PostedReel.created_at))
+            .join(MonitoredProfile, PostedReel.profile_id == MonitoredProfile.id)
+            .where(
+                MonitoredProfile.instagram_account_id.in_(adaptive_ids),
+                PostedReel.created_at >= now - timedelta(days=settings.ADAPTIVE_WINDOW_DAYS)
+            )
+            .group_by(MonitoredProfile.instagram_account_id, PostedReel.instagram_reel_code)
+        )
+        history = {account_id: [] for account_id in adaptive_ids}
+        for account_id, created_at in result.all():
+            history[account_id].append(created_at)
+        for account_id in adaptive_ids:
+            history[account_id].extend(
+                datetime.fromtimestamp(reel['taken_at_timestamp'], tz=now.tzinfo)
+                for reel in discoveries.get(account_id, [])
+            )
+
+        accounts_by_id = {account.id: account for account in accounts}
+        updates = {}
+        for account_id, post_times in history.items():
+            account = accounts_by_id[account_id]
+            account.effective_interval_minutes = self.estimate_interval(post_times, now)
+            interval = self.subscription_interval(account, subscriptions[account_id])
+            updates[account_id] = {
+                "effective_interval_minutes": account.effective_interval_minutes,
+                "next_check_at": now + timedelta(minutes=interval)
+            }
+        return updates
+
+    def failure_update(self, account: InstagramAccount, interval: int, error: str, now: datetime) -> Dict[str, Any]:
+        """Column updates after a profile-level failure: exponential backoff, then quarantine"""
+        failures = (account.consecutive_failures or 0) + 1
+        values = {"consecutive_failures": failures, "last_error": error[:1000]}
+
+        if failures >= settings.PROFILE_QUARANTINE_AFTER_FAILURES:
+            values["quarantined_at"] = now
+            values["next_check_at"] = now + timedelta(minutes=settings.PROFILE_PROBE_INTERVAL_MINUTES)
+            logger.warning(
+                "Account quarantined",
+                account_id=account.id,
+                username=account.username,
+                failures=failures,
+                error=error
+            )
+            return values
+
+        backoff = min(settings.PROFILE_BACKOFF_MAX_MINUTES, interval * 2 ** failures)
+        # Jitter keeps accounts that failed together from retrying together
+        values["next_check_at"] = now + timedelta(minutes=backoff * random.uniform(0.8, 1.2))
+        return values
+
+    def transient_failure_update(self, interval: int, error: str, now: datetime) -> Dict[str, Any]:
+        """Column updates after a transient failure: retry later, failure count untouched
+
+        A proxy or Instagram outage hits every account at once, so it must
+        never push healthy accounts towards quarantine.
+        """
+        return {
+            "last_error": error[:1000],
+            "next_check_at": now + timedelta(minutes=interval * random.uniform(0.8, 1.2))
+        }
+
+    def recovery_update(self, account: InstagramAccount) -> Dict[str, Any]:
+        """Column updates after a successful check of a previously failing account"""
+        if not account.consecutive_failures and not account.quarantined_at and not account.last_error:
+            return {}
+        return {"consecutive_failures": 0, "last_error": None, "quarantined_at": None}
+
+    async def link_profiles(self, db: AsyncSession) -> List[Dict[str, int]]:
+        """Attach monitored profiles that have no shared account yet
+
+        Creates the missing accounts and links the profiles in two
+        statements; both are no-ops once every profile is linked. Returns the
+        Reels backfilled for the newly linked profiles (see
+        ``_backfill_profile``) as ``{"reel_id", "user_id"}`` dicts.
+        """
+        username = normalize_username(MonitoredProfile.instagram_username)
+        await db.execute(
+            insert(InstagramAccount)
+            .from_select(
+                ["username"],
+                select(username).where(MonitoredProfile.instagram_account_id.is_(None)).distinct()
+            )
+            .on_conflict_do_nothing(index_elements=[InstagramAccount.username])
+        )
+        result = await db.execute(
+            update(MonitoredProfile)
+            .where(
+                MonitoredProfile.instagram_account_id.is_(None),
+                InstagramAccount.username == username
+            )
+            .values(instagram_account_id=InstagramAccount.id)
+            .returning(MonitoredProfile.id, MonitoredProfile.user_id, InstagramAccount.id, InstagramAccount.last_seen_reel_code)
+            .execution_options(synchronize_session=False)
+        )
+        linked = result.all()
+
+        backfilled = []
+        for profile_id, user_id, account_id, cursor in linked:
+            # A fresh account has no cursor: its first check brings the recent Reels
+            if cursor is not None:
+                reel_ids = await self._backfill_profile(db, profile_id, account_id)
+                backfilled.extend({"reel_id": reel_id, "user_id": user_id} for reel_id in reel_ids)
+        await db.commit()
+
+        if linked:
+            logger.info("Profiles linked to shared accounts", count=len(linked), backfilled_reels=len(backfilled))
+        return backfilled
+
+    async def _backfill_profile(self, db: AsyncSession, profile_id: int, account_id: int) -> List[int]:
+        """Give a profile that joins an already tracked account its recent Reels
+
+        The account's cursor is shared, so the new subscriber's first check
+        would only see Reels posted from now on. Instead it gets the newest
+        ``REEL_DISCOVERY_PAGE_SIZE`` Reels its fellow subscribers have (what
+        an uncursored first check returns), copied as ``pending`` rows. Their
+        videos are usually already stored, so the download stage reuses them.
+        """
+        recent = (
+            select(func.max(PostedReel.id).label("reel_id"))
+            .join(MonitoredProfile, PostedReel.profile_id == MonitoredProfile.id)
+            .where(MonitoredProfile.instagram_account_id == account_id, MonitoredProfile.id != profile_id)
+            .group_by(PostedReel.instagram_reel_code)
+            .order_by(func.max(PostedReel.created_at).desc())
+            .limit(settings.REEL_DISCOVERY_PAGE_SIZE)
+            .subquery()
+        )
+        result = await db.execute(
+            insert(PostedReel)
+            .from_select(
+                ["profile_id", "instagram_reel_code", "instagram_reel_url", "instagram_video_url", "caption", "status"],
+                select(
+                    literal(profile_id),
+                    PostedReel.instagram_reel_code,
+                    PostedReel.instagram_reel_url,
+                    PostedReel.instagram_video_url,
+                    PostedReel.caption,
+                    literal("pending")
+                )
+                .join(recent, recent.c.reel_id == PostedReel.id)
+            )
+            .on_conflict_do_nothing(index_elements=[PostedReel.profile_id, PostedReel.instagram_reel_code])
+            .returning(PostedReel.id)
+        )
+        return list(result.scalars().all())
+
+    async def _claim(self, db: AsyncSession, condition, interval_minutes, limit: int) -> List[int]:
+        """Lock up to ``limit`` matching due accounts and push their next check forward
+
+        Accounts are taken round-robin by tenant: each tenant's most overdue
+        account first, then each tenant's second, and so on. A shared account
+        takes the earliest turn among its subscribers. The returned ids keep
+        that order, so fan-out batches interleave tenants too.
+        """
+        now = func.now()
+
+        turns = (
+            select(
+                InstagramAccount.id.label("account_id"),
+                func.row_number()
+                .over(partition_by=MonitoredProfile.user_id, order_by=InstagramAccount.next_check_at)
+                .label("turn")
+            )
+            .outerjoin(
+                MonitoredProfile,
+                and_(
+                    MonitoredProfile.instagram_account_id == InstagramAccount.id,
+                    MonitoredProfile.is_active == True
+                )
+            )
+            .where(condition, InstagramAccount.next_check_at <= now)
+            .subquery()
+        )
+        account_turns = (
+            select(turns.c.account_id, func.min(turns.c.turn).label("turn"))
+            .group_by(turns.c.account_id)
+            .subquery()
+        )
+        result = await db.execute(
+            select(InstagramAccount.id)
+            .join(account_turns, account_turns.c.account_id == InstagramAccount.id)
+            .order_by(account_turns.c.turn, InstagramAccount.next_check_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True, of=InstagramAccount)
+        )
+        account_ids = list(result.scalars().all())
+
+        if account_ids:
+            await db.execute(
+                update(InstagramAccount)
+                .where(InstagramAccount.id.in_(account_ids))
+                .values(
+                    last_checked_at=now,
+                    next_check_at=now + interval_minutes * timedelta(minutes=1)
+                )
+                .execution_options(synchronize_session=False)
+            )
+            await db.execute(
+                update(MonitoredProfile)
+                .where(
+                    MonitoredProfile.instagram_account_id.in_(account_ids),
+                    MonitoredProfile.is_active == True
+                )
+                .values(last_checked_at=now)
+                .execution_options(synchronize_session=False)
+            )
+        await db.commit()
+        return account_ids
+
+    async def claim_due_accounts(self, db: AsyncSession, limit: Optional[int] = None) -> List[int]:
+        """Claim due accounts and push their next check forward
+
+        Rows are locked with SKIP LOCKED so overlapping sweeps never claim the
+        same account twice. Quarantined accounts are left to the probe.
+        """
+        limit = limit or self.max_due_per_sweep
+        account_ids = await self._claim(
+            db,
+            InstagramAccount.quarantined_at.is_(None),
+            self.interval_expression(),
+            limit
+        )
+
+        logger.info("Due accounts claimed", count=len(account_ids), limit=limit)
+        return account_ids
+
+    async def claim_quarantined_accounts(self, db: AsyncSession, limit: Optional[int] = None) -> List[int]:
+        """Claim quarantined accounts whose next probe is due"""
+        limit = limit or settings.PROFILE_PROBE_BATCH_SIZE
+        account_ids = await self._claim(
+            db,
+            InstagramAccount.quarantined_at.isnot(None),
+            settings.PROFILE_PROBE_INTERVAL_MINUTES,
+            limit
+        )
+
+        logger.info("Quarantined accounts claimed for probing", count=len(account_ids))
+        return account_ids
+
+# Global scheduler instance
+account_scheduler = AccountScheduler()
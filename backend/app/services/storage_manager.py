@@ -0,0 +1,160 @@
+import asyncio
+import os
+import time
+from typing import Any, Dict, List, Optional, Set
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+import structlog
+from app.core.config import settings
+from app.models.posted_reel import PostedReel
+from app.services.video_store import VideoStore, video_store
+
+logger = structlog.get_logger()
+
+# Reels in these states no longer need their video on disk. Dead-lettered reels
+# keep theirs: a requeue could not download it again once Instagram's URL expired
+TERMINAL_STATUSES = ("posted", "failed", "duplicate", "discarded")
+
+class StorageManager:
+    """Keeps the video store within a byte budget
+
+    Objects older than ``STORAGE_MAX_AGE_DAYS`` are removed first; if the
+    store is still above ``STORAGE_BUDGET_BYTES`` the least recently used
+    objects go next, until usage drops to the low watermark. An object is
+    never removed while any reel that is not in a terminal state points to
+    it. Abandoned staging files in ``incoming/`` are removed by age.
+    """
+
+    def __init__(self, store: VideoStore):
+        self.store = store
+
+    @staticmethod
+    def _last_used(stat: os.stat_result) -> float:
+        # atime is unreliable on noatime mounts, the store touches mtime on reuse
+        return max(stat.st_atime, stat.st_mtime)
+
+    def _scan_objects(self) -> List[Dict[str, Any]]:
+        objects = []
+        for directory, _, files in os.walk(self.store.objects_dir):
+            for name in files:
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                objects.append({
+                    "sha256": name.split(".", 1)[0],
+                    "path": path,
+                    "bytes": stat.st_size,
+                    "last_used": self._last_used(stat)
+                })
+        return objects
+
+    def _remove_stale_incoming(self, max_age_seconds: float) -> int:
+        reclaimed = 0
+        if not os.path.isdir(self.store.incoming_dir):
+            return 0
+        cutoff = time.time() - max_age_seconds
+        for entry in os.scandir(self.store.incoming_dir):
+            try:
+                stat = entry.stat()
+                if entry.is_file() and stat.st_mtime < cutoff:
+                    os.remove(entry.path)
+                    reclaimed += stat.st_size
+            except FileNotFoundError:
+                continue
+        return reclaimed
+
+    @staticmethod
+    def _remove_objects(objects: List[Dict[str, Any]]) -> int:
+        reclaimed = 0
+        for obj in objects:
+            try:
+                os.remove(obj["path"])
+                reclaimed += obj["bytes"]
+            except FileNotFoundError:
+                continue
+        return reclaimed
+
+    async def _protected_digests(self, db: AsyncSession, digests: List[str]) -> Set[str]:
+        """Digests still referenced by reels that have not finished"""
+        if not digests:
+            return set()
+        result = await db.execute(
+            select(PostedReel.video_sha256)
+            .where(
+                PostedReel.video_sha256.in_(digests),
+                PostedReel.status.notin_(TERMINAL_STATUSES)
+            )
+            .distinct()
+        )
+        return set(result.scalars().all())
+
+    def select_evictions(
+        self,
+        objects: List[Dict[str, Any]],
+        protected: Set[str],
+        now: float,
+        budget: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Objects to remove: expired ones, then least recently used over budget"""
+        budget = settings.STORAGE_BUDGET_BYTES if budget is None else budget
+        max_age = settings.STORAGE_MAX_AGE_DAYS * 86400
+        candidates = sorted(
+            (obj for obj in objects if obj["sha256"] not in protected),
+            key=lambda obj: obj["last_used"]
+        )
+
+        evict = [obj for obj in candidates if now - obj["last_used"] > max_age]
+        usage = sum(obj["bytes"] for obj in objects) - sum(obj["bytes"] for obj in evict)
+
+        if usage > budget:
+            target = budget * settings.STORAGE_LOW_WATERMARK
+            for obj in candidates:
+                if usage <= target:
+                    break
+                if now - obj["last_used"] > max_age:
+                    continue
+                evict.append(obj)
+                usage -= obj["bytes"]
+
+        return evict
+
+    async def enforce_budget(self, db: AsyncSession) -> Dict[str, Any]:
+        """Evict unused videos and report how many bytes were reclaimed"""
+        objects = await asyncio.to_thread(self._scan_objects)
+        usage = sum(obj["bytes"] for obj in objects)
+        protected = await self._protected_digests(db, [obj["sha256"] for obj in objects])
+
+        evict = self.select_evictions(objects, protected, time.time())
+        reclaimed = await asyncio.to_thread(self._remove_objects, evict)
+        reclaimed_incoming = await asyncio.to_thread(
+            self._remove_stale_incoming, settings.STORAGE_STALE_INCOMING_HOURS * 3600
+        )
+
+        # Reels keep their digest, only the local path goes away
+        evicted = [obj["sha256"] for obj in evict]
+        if evicted:
+            await db.execute(
+                update(PostedReel)
+                .where(PostedReel.video_sha256.in_(evicted))
+                .values(video_file_path=None)
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+
+        stats = {
+            "status": "success",
+            "objects": len(objects),
+            "objects_protected": len(protected),
+            "objects_evicted": len(evict),
+            "bytes_before": usage,
+            "bytes_after": usage - reclaimed,
+            "bytes_reclaimed": reclaimed + reclaimed_incoming,
+            "budget_bytes": settings.STORAGE_BUDGET_BYTES
+        }
+        logger.info("Storage budget enforced", **stats)
+        return stats
+
+# Global storage manager instance
+storage_manager = StorageManager(video_store)
@@ -1,12 +1,31 @@
 import httpx
 import asyncio
-from typing import Dict, List, Optional, Any
+import os
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Any
 from app.core.config import settings
 from app.schemas.tiktok_credentials import TikTokCredentialsResponse
 import structlog
 
 logger = structlog.get_logger()
 
+# TikTok accepts chunks between 5MB and 64MB; the last one may grow up to 128MB
+MIN_CHUNK_SIZE = 5 * 1024 * 1024
+MAX_CHUNK_SIZE = 64 * 1024 * 1024
+
+def plan_chunks(video_size: int, chunk_size: int) -> List[tuple]:
+    """Split a file into ``(first_byte, last_byte)`` ranges the way TikTok expects
+
+    Files under the minimum chunk size go up in one piece; otherwise there are
+    ``video_size // chunk_size`` chunks and the last one absorbs the remainder.
+    """
+    chunk_size = min(MAX_CHUNK_SIZE, max(MIN_CHUNK_SIZE, chunk_size))
+    if video_size <= chunk_size:
+        return [(0, video_size - 1)]
+    count = video_size // chunk_size
+    ranges = [(i * chunk_size, (i + 1) * chunk_size - 1) for i in range(count)]
+    ranges[-1] = (ranges[-1][0], video_size - 1)
+    return ranges
+
 class TikTokService:
     """Service for TikTok API integration using official APIs"""
     
@@ -15,6 +34,55 @@ class TikTokService:
         self.client_key = settings.TIKTOK_CLIENT_KEY
         self.client_secret = settings.TIKTOK_CLIENT_SECRET
         self.redirect_uri = settings.TIKTOK_REDIRECT_URI
+        self._client: Optional[httpx.AsyncClient] = None
+        self._stats = {"requests": 0, "connections_opened": 0, "http2_requests": 0}
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Process-wide pooled client, created on first use inside the running loop"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=settings.TIKTOK_HTTP2,
+                limits=httpx.Limits(
+                    max_connections=settings.TIKTOK_HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.TIKTOK_HTTP_MAX_KEEPALIVE,
+                    keepalive_expiry=settings.TIKTOK_HTTP_KEEPALIVE_SECONDS
+                ),
+                timeout=httpx.Timeout(settings.TIKTOK_HTTP_TIMEOUT_SECONDS),
+                event_hooks={"request": [self._attach_trace]}
+            )
+        return self._client
+    
+    async def _attach_trace(self, request: httpx.Request):
+        request.extensions["trace"] = self._trace
+    
+    async def _trace(self, event_name: str, info: Dict[str, Any]):
+        """httpcore trace hook: counts requests and newly opened connections"""
+        if event_name == "connection.connect_tcp.complete":
+            self._stats["connections_opened"] += 1
+        elif event_name.endswith("send_request_headers.started"):
+            self._stats["requests"] += 1
+            if event_name.startswith("http2."):
+                self._stats["http2_requests"] += 1
+    
+    def stats(self) -> Dict[str, Any]:
+        """Connection reuse counters for the pooled client"""
+        stats = dict(self._stats)
+        requests = stats["requests"]
+        stats["connections_reused"] = max(0, requests - stats["connections_opened"])
+        stats["reuse_ratio"] = round(stats["connections_reused"] / requests, 3) if requests else 0.0
+        return stats
+    
+    async def start(self):
+        """Open the pooled client (FastAPI lifespan / Celery worker init)"""
+        self.client
+    
+    async def close(self):
+        """Close the pooled client and its connections"""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+            logger.info("TikTok HTTP client closed", **self.stats())
+        self._client = None
     
     async def get_authorization_url(self, state: str) -> str:
         """Generate TikTok OAuth authorization URL"""
@@ -40,10 +108,10 @@ class TikTokService:
             "redirect_uri": self.redirect_uri
         }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(token_url, data=data)
-            response.raise_for_status()
-            return response.json()
+        client = self.client
+        response = await client.post(token_url, data=data)
+        response.raise_for_status()
+        return response.json()
     
     async def refresh_access_token(self, refresh_token: str) -> Dict[str, Any]:
         """Refresh access token using refresh token"""
@@ -56,10 +124,10 @@ class TikTokService:
             "grant_type": "refresh_token"
         }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(token_url, data=data)
-            response.raise_for_status()
-            return response.json()
+        client = self.client
+        response = await client.post(token_url, data=data)
+        response.raise_for_status()
+        return response.json()
     
     async def get_user_info(self, access_token: str) -> Dict[str, Any]:
         """Get user profile information using Display API"""
@@ -73,10 +141,10 @@ class TikTokService:
             "fields": "open_id,union_id,avatar_url,display_name"
         }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(user_url, headers=headers, params=params)
-            response.raise_for_status()
-            return response.json()
+        client = self.client
+        response = await client.get(user_url, headers=headers, params=params)
+        response.raise_for_status()
+        return response.json()
     
     async def get_user_videos(self, access_token: str, max_count: int = 20) -> Dict[str, Any]:
         """Get user's recent videos using Display API"""
@@ -95,15 +163,15 @@ class TikTokService:
             "fields": "id,title,video_description,duration,cover_image_url,embed_link"
         }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                videos_url, 
-                headers=headers, 
-                params=params,
-                json=data
-            )
-            response.raise_for_status()
-            return response.json()
+        client = self.client
+        response = await client.post(
+            videos_url, 
+            headers=headers, 
+            params=params,
+            json=data
+        )
+        response.raise_for_status()
+        return response.json()
     
     async def post_video_direct(
         self, 
@@ -121,7 +189,6 @@ class TikTokService:
         }
         
         data = {
-            "video_url": video_url,
             "post_info": {
                 "title": caption,
                 "description": caption,
@@ -130,13 +197,17 @@ class TikTokService:
                 "disable_comment": False,
                 "disable_stitch": False,
                 "video_cover_timestamp_ms": 1000
+            },
+            "source_info": {
+                "source": "PULL_FROM_URL",
+                "video_url": video_url
             }
         }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(post_url, headers=headers, json=data)
-            response.raise_for_status()
-            return response.json()
+        client = self.client
+        response = await client.post(post_url, headers=headers, json=data)
+        response.raise_for_status()
+        return response.json()
     
     async def check_post_status(self, access_token: str, publish_id: str) -> Dict[str, Any]:
         """Check the status of a video post"""
@@ -151,19 +222,84 @@ class TikTokService:
             "publish_id": publish_id
         }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(status_url, headers=headers, json=data)
-            response.raise_for_status()
-            return response.json()
+        client = self.client
+        response = await client.post(status_url, headers=headers, json=data)
+        response.raise_for_status()
+        return response.json()
     
+    async def _read_range(self, file_path: str, first: int, last: int) -> AsyncIterator[bytes]:
+        """Stream a byte range from disk in small blocks, off the event loop"""
+        read_size = settings.TIKTOK_UPLOAD_READ_SIZE
+        f = await asyncio.to_thread(open, file_path, "rb")
+        try:
+            await asyncio.to_thread(f.seek, first)
+            remaining = last - first + 1
+            while remaining > 0:
+                block = await asyncio.to_thread(f.read, min(read_size, remaining))
+                if not block:
+                    break
+                remaining -= len(block)
+                yield block
+        finally:
+            await asyncio.to_thread(f.close)
+
+    async def _upload_chunk(
+        self,
+        client: httpx.AsyncClient,
+        upload_url: str,
+        video_file_path: str,
+        first: int,
+        last: int,
+        video_size: int
+    ) -> httpx.Response:
+        """PUT one chunk, retrying only this chunk on network and server errors"""
+        headers = {
+            "Content-Type": "video/mp4",
+            "Content-Length": str(last - first + 1),
+            "Content-Range": f"bytes {first}-{last}/{video_size}"
+        }
+        attempts = settings.TIKTOK_UPLOAD_CHUNK_RETRIES
+        for attempt in range(1, attempts + 1):
+            try:
+                response = await client.put(
+                    upload_url,
+                    headers=headers,
+                    content=self._read_range(video_file_path, first, last),
+                    timeout=httpx.Timeout(
+                        settings.TIKTOK_HTTP_TIMEOUT_SECONDS,
+                        write=settings.TIKTOK_HTTP_UPLOAD_TIMEOUT_SECONDS
+                    )
+                )
+                if response.status_code < 500:
+                    response.raise_for_status()
+                    return response
+                error = f"HTTP {response.status_code}"
+            except httpx.TransportError as e:
+                error = str(e)
+            if attempt == attempts:
+                raise RuntimeError(f"Chunk {first}-{last} failed after {attempts} attempts: {error}")
+            logger.warning("Retrying TikTok upload chunk", first_byte=first, attempt=attempt, error=error)
+            await asyncio.sleep(2 ** attempt)
+
     async def upload_video(
         self, 
         access_token: str, 
         video_file_path: str, 
         caption: str = "",
-        privacy_level: str = "SELF_ONLY"
+        privacy_level: str = "SELF_ONLY",
+        on_progress: Optional[Callable[[str, int], Awaitable[None]]] = None
     ) -> Dict[str, Any]:
-        """Upload video file to TikTok using Content Posting API"""
+        """Upload video file to TikTok using the chunked FILE_UPLOAD flow
+
+        The file is streamed from disk one chunk at a time, so memory use
+        stays constant regardless of the video size. ``on_progress`` is
+        awaited with ``(publish_id, bytes_uploaded)`` once the upload is
+        initialised and after every chunk.
+        """
+        video_size = (await asyncio.to_thread(os.stat, video_file_path)).st_size
+        chunks = plan_chunks(video_size, settings.TIKTOK_UPLOAD_CHUNK_SIZE)
+        chunk_size = chunks[0][1] - chunks[0][0] + 1
+
         # Step 1: Initialize upload
         init_url = f"{self.base_url}/v2/post/publish/video/init/"
         
@@ -181,34 +317,38 @@ class TikTokService:
                 "disable_comment": False,
                 "disable_stitch": False,
                 "video_cover_timestamp_ms": 1000
+            },
+            "source_info": {
+                "source": "FILE_UPLOAD",
+                "video_size": video_size,
+                "chunk_size": chunk_size,
+                "total_chunk_count": len(chunks)
             }
         }
         
-        async with httpx.AsyncClient() as client:
-            # Initialize upload
-            response = await client.post(init_url, headers=headers, json=data)
-            response.raise_for_status()
-            init_result = response.json()
+        client = self.client
+        # Initialize upload
+        response = await client.post(init_url, headers=headers, json=data)
+        response.raise_for_status()
+        init_result = response.json()
             
-            upload_url = init_result["data"]["upload_url"]
-            publish_id = init_result["data"]["publish_id"]
+        upload_url = init_result["data"]["upload_url"]
+        publish_id = init_result["data"]["publish_id"]
             
-            # Step 2: Upload video file
-            with open(video_file_path, "rb") as video_file:
-                upload_headers = {
-                    "Content-Type": "video/mp4"
-                }
-                upload_response = await client.post(
-                    upload_url, 
-                    headers=upload_headers, 
-                    content=video_file.read()
-                )
-                upload_response.raise_for_status()
+        if on_progress:
+            await on_progress(publish_id, 0)
             
-            return {
-                "publish_id": publish_id,
-                "status": "uploaded"
-            }
+        # Step 2: Upload the chunks in order
+        for first, last in chunks:
+            await self._upload_chunk(client, upload_url, video_file_path, first, last, video_size)
+            if on_progress:
+                await on_progress(publish_id, last + 1)
+            
+        logger.info("Video uploaded to TikTok", publish_id=publish_id, bytes=video_size, chunks=len(chunks))
+        return {
+            "publish_id": publish_id,
+            "status": "uploaded"
+        }
 
 # Global service instance
 tiktok_service = TikTokService()
@@ -0,0 +1,215 @@
+import asyncio
+import secrets
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+import httpx
+from sqlalchemy import select, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+import structlog
+from app.core.config import settings
+from app.core.database import async_session_factory
+from app.core.redis import get_async_redis
+from app.models.tiktok_credentials import TikTokCredentials
+from app.services.tiktok_service import tiktok_service
+
+logger = structlog.get_logger()
+
+# Deletes the lock only if it still holds our token, so a holder whose lock
+# expired never releases the lock of the process that took over
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+def expires_at_for(expires_in: int, now: Optional[datetime] = None) -> datetime:
+    """Absolute expiry for a token TikTok says is valid for ``expires_in`` seconds"""
+    return (now or datetime.now(timezone.utc)) + timedelta(seconds=int(expires_in))
+
+class TikTokTokenService:
+    """Refreshes TikTok access tokens before they expire
+
+    A beat job refreshes every token expiring inside a look-ahead window,
+    a bounded number at a time, so uploads find a valid token and never
+    refresh inline. API requests that meet an expired token refresh it
+    themselves. Either way a per-user Redis lock (``SET NX``) makes sure
+    only one process calls TikTok for a given token; the others wait for
+    it or skip, since TikTok rotates the refresh token on every use.
+    """
+
+    def __init__(self, prefix: str = "tiktok:token-refresh"):
+        self.prefix = prefix
+        self._release_script = None
+
+    def _lock_key(self, user_id: int) -> str:
+        return f"{self.prefix}:{user_id}"
+
+    async def _acquire(self, user_id: int) -> Optional[str]:
+        """Take the user's refresh lock; returns its token, or None if it is held
+
+        Fails closed: without Redis nobody can tell whether another process
+        is refreshing, and a second refresh would burn the rotated refresh
+        token, so the refresh is skipped until the lock can be taken.
+        """
+        token = secrets.token_hex(16)
+        try:
+            acquired = await get_async_redis().set(
+                self._lock_key(user_id), token, nx=True, ex=settings.TIKTOK_TOKEN_LOCK_SECONDS
+            )
+        except Exception as e:
+            logger.warning("Token refresh lock unavailable, refresh skipped", user_id=user_id, error=str(e))
+            return None
+        return token if acquired else None
+
+    async def _release(self, user_id: int, token: str):
+        try:
+            if self._release_script is None:
+                self._release_script = get_async_redis().register_script(RELEASE_LOCK_SCRIPT)
+            await self._release_script(keys=[self._lock_key(user_id)], args=[token])
+        except Exception as e:
+            logger.warning("Failed to release token refresh lock", user_id=user_id, error=str(e))
+
+    async def _wait_for_release(self, user_id: int):
+        """Wait until another process's refresh for this user is over"""
+        deadline = asyncio.get_running_loop().time() + settings.TIKTOK_TOKEN_LOCK_SECONDS
+        while asyncio.get_running_loop().time() < deadline:
+            try:
+                if not await get_async_redis().exists(self._lock_key(user_id)):
+                    return
+            except Exception:
+                return
+            await asyncio.sleep(0.5)
+
+    @staticmethod
+    def needs_refresh(credentials: TikTokCredentials, within_seconds: int, now: Optional[datetime] = None) -> bool:
+        """Whether the token expires within ``within_seconds`` (or its expiry is unknown)"""
+        if credentials.expires_at is None:
+            return True
+        now = now or datetime.now(timezone.utc)
+        return credentials.expires_at <= now + timedelta(seconds=within_seconds)
+
+    @staticmethod
+    def is_usable(credentials: TikTokCredentials, now: Optional[datetime] = None) -> bool:
+        """Whether the token is valid long enough to start an upload with it
+
+        Credentials saved before expiries were recorded count as usable until
+        the beat job fills in ``expires_at``.
+        """
+        if credentials.expires_at is None:
+            return True
+        now = now or datetime.now(timezone.utc)
+        return credentials.expires_at > now + timedelta(seconds=settings.TIKTOK_TOKEN_MIN_VALIDITY_SECONDS)
+
+    async def refresh(self, db: AsyncSession, credentials: TikTokCredentials, within_seconds: int = 0) -> bool:
+        """Refresh one user's token unless another process is already doing it
+
+        ``within_seconds`` is re-checked under the lock, so a token another
+        process just refreshed is not refreshed again. Returns whether the
+        token was refreshed here.
+        """
+        user_id = credentials.user_id
+        lock = await self._acquire(user_id)
+        if lock is None:
+            return False
+
+        try:
+            await db.refresh(credentials)
+            if not self.needs_refresh(credentials, within_seconds):
+                return False
+
+            try:
+                token_data = await tiktok_service.refresh_access_token(credentials.refresh_token)
+            except httpx.HTTPStatusError as e:
+                # The OAuth error body says why (e.g. an expired refresh token)
+                try:
+                    token_data = e.response.json()
+                except ValueError:
+                    raise e
+            data = token_data.get("data", token_data)
+            if "access_token" not in data:
+                # TikTok's v2 OAuth errors are flat strings: "error" and "error_description"
+                error = token_data.get("error") or "unknown_error"
+                description = token_data.get("error_description") or data.get("description") or ""
+                raise RuntimeError(f"TikTok token refresh failed: {error} {description}".strip())
+
+            credentials.access_token = data["access_token"]
+            credentials.refresh_token = data.get("refresh_token", credentials.refresh_token)
+            credentials.expires_in = data["expires_in"]
+            credentials.expires_at = expires_at_for(data["expires_in"])
+            if data.get("scope"):
+                credentials.scope = data["scope"]
+            await db.commit()
+
+            logger.info("TikTok token refreshed", user_id=user_id, expires_at=credentials.expires_at.isoformat())
+            return True
+
+        finally:
+            await self._release(user_id, lock)
+
+    async def ensure_valid(self, db: AsyncSession, credentials: TikTokCredentials) -> TikTokCredentials:
+        """Make sure an API request holds an unexpired token, refreshing it if needed
+
+        If another process is refreshing the same token, wait for it and
+        use the token it stored.
+        """
+        if credentials.expires_at is None or not self.needs_refresh(credentials, 0):
+            return credentials
+
+        if not await self.refresh(db, credentials):
+            await self._wait_for_release(credentials.user_id)
+            await db.refresh(credentials)
+        return credentials
+
+    async def refresh_expiring(self, limit: Optional[int] = None) -> Dict[str, Any]:
+        """Refresh every token that expires inside the look-ahead window"""
+        window = settings.TIKTOK_TOKEN_REFRESH_WINDOW_SECONDS
+        cutoff = datetime.now(timezone.utc) + timedelta(seconds=window)
+
+        async with async_session_factory() as db:
+            result = await db.execute(
+                select(TikTokCredentials.user_id)
+                .where(or_(TikTokCredentials.expires_at.is_(None), TikTokCredentials.expires_at <= cutoff))
+                .order_by(TikTokCredentials.expires_at.asc().nullsfirst())
+                .limit(limit or settings.TIKTOK_TOKEN_REFRESH_BATCH_SIZE)
+            )
+            user_ids = list(result.scalars().all())
+
+        if not user_ids:
+            return {"status": "success", "due": 0, "refreshed": 0, "skipped": 0, "failed": 0}
+
+        semaphore = asyncio.Semaphore(settings.TIKTOK_TOKEN_REFRESH_CONCURRENCY)
+
+        async def run(user_id: int) -> Optional[bool]:
+            # One session per refresh: sessions cannot be shared across tasks
+            async with semaphore, async_session_factory() as db:
+                try:
+                    credentials = await db.get(TikTokCredentials, user_id)
+                    if credentials is None:
+                        return False
+                    return await self.refresh(db, credentials, within_seconds=window)
+                except Exception as e:
+                    logger.error("Error refreshing TikTok token", user_id=user_id, error=str(e))
+                    return None
+
+        results = await asyncio.gather(*(run(user_id) for user_id in user_ids))
+        stats = {
+            "status": "success",
+            "due": len(user_ids),
+            "refreshed": sum(1 for result in results if result),
+            "skipped": sum(1 for result in results if result is False),
+            "failed": sum(1 for result in results if result is None)
+        }
+        logger.info("TikTok tokens refreshed", **stats)
+        return stats
+
+    async def refresh_user(self, user_id: int) -> bool:
+        """Refresh one user's token if it is inside the look-ahead window"""
+        async with async_session_factory() as db:
+            credentials = await db.get(TikTokCredentials, user_id)
+            if credentials is None:
+                return False
+            return await self.refresh(db, credentials, within_seconds=settings.TIKTOK_TOKEN_REFRESH_WINDOW_SECONDS)
+
+# Global service instance
+tiktok_token_service = TikTokTokenService()
@@ -0,0 +1,120 @@
+import asyncio
+import os
+from typing import Any, Dict, Iterable, Optional
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+import structlog
+from app.core.config import settings
+from app.models.posted_reel import PostedReel
+from app.services.download_service import video_downloader
+
+logger = structlog.get_logger()
+
+class VideoStore:
+    """Content-addressed video storage under ``UPLOAD_DIR``
+
+    Every video is stored once, at ``objects/<aa>/<bb>/<sha256>.mp4``, no
+    matter how many reels point to it. Reels reference their video through
+    ``PostedReel.video_sha256``; the number of reels per digest is the
+    object's reference count. Downloads go to ``incoming/`` first and are
+    moved into place (or dropped, if the object already exists) once their
+    digest is known.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = os.path.abspath(root or settings.UPLOAD_DIR)
+        self.objects_dir = os.path.join(self.root, "objects")
+        self.incoming_dir = os.path.join(self.root, "incoming")
+
+    def object_path(self, sha256: str) -> str:
+        """Sharded path of the object with this digest"""
+        return os.path.join(self.objects_dir, sha256[:2], sha256[2:4], f"{sha256}.mp4")
+
+    def incoming_path(self, key: Any) -> str:
+        """Staging path for a download; stable per key so retries can resume"""
+        return os.path.join(self.incoming_dir, f"{key}.mp4")
+
+    def exists(self, sha256: str) -> bool:
+        return os.path.exists(self.object_path(sha256))
+
+    @staticmethod
+    def _touch(path: str) -> int:
+        """Mark an object as recently used for eviction and return its size"""
+        os.utime(path)
+        return os.stat(path).st_size
+
+    def _commit(self, staged_path: str, sha256: str) -> bool:
+        """Move a finished download into the store; False if it was already there"""
+        target = self.object_path(sha256)
+        if os.path.exists(target):
+            os.remove(staged_path)
+            self._touch(target)
+            return False
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(staged_path, target)
+        return True
+
+    async def lookup_many(self, db: AsyncSession, reel_codes: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Stored videos for many Instagram media codes, in one query"""
+        reel_codes = list(set(reel_codes))
+        if not reel_codes:
+            return {}
+        result = await db.execute(
+            select(PostedReel.instagram_reel_code, PostedReel.video_sha256)
+            .where(
+                PostedReel.instagram_reel_code.in_(reel_codes),
+                PostedReel.video_sha256.isnot(None)
+            )
+            .distinct()
+        )
+        found = {}
+        for reel_code, sha256 in result.all():
+            if reel_code in found:
+                continue
+            path = self.object_path(sha256)
+            try:
+                size = await asyncio.to_thread(self._touch, path)
+            except FileNotFoundError:
+                continue
+            found[reel_code] = {"sha256": sha256, "path": path, "bytes": size}
+        return found
+
+    async def download(self, reel: PostedReel, proxy_url: Optional[str] = None) -> Dict[str, Any]:
+        """Download a reel's video into the store (no database access)"""
+        if not reel.instagram_video_url:
+            return {"success": False, "error": "Reel has no video URL", "bytes": 0, "resumable": False}
+
+        staged_path = self.incoming_path(reel.id)
+        await asyncio.to_thread(os.makedirs, self.incoming_dir, exist_ok=True)
+        result = await video_downloader.download(reel.instagram_video_url, staged_path, proxy_url)
+        if not result["success"]:
+            return result
+
+        stored_new = await asyncio.to_thread(self._commit, staged_path, result["sha256"])
+        if not stored_new:
+            logger.info("Downloaded video deduplicated", reel_id=reel.id, sha256=result["sha256"])
+
+        return {
+            "success": True,
+            "cached": False,
+            "sha256": result["sha256"],
+            "path": self.object_path(result["sha256"]),
+            "bytes": result["bytes"]
+        }
+
+    async def references(self, db: AsyncSession, digests: Iterable[str]) -> Dict[str, int]:
+        """Number of reels that point to each digest"""
+        digests = list(digests)
+        if not digests:
+            return {}
+        result = await db.execute(
+            select(PostedReel.video_sha256, func.count())
+            .where(PostedReel.video_sha256.in_(digests))
+            .group_by(PostedReel.video_sha256)
+        )
+        counts = dict.fromkeys(digests, 0)
+        counts.update(dict(result.all()))
+        return counts
+
+# Global store instance
+video_store = VideoStore()
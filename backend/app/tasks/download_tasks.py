@@ -0,0 +1,74 @@
+import math
+from typing import List
+from app.celery_app import celery_app
+from app.core.config import settings
+from app.core.database import async_session_factory
+from app.services.fair_dispatch import interleave
+from app.services.reel_download_service import reel_download_service
+from app.tasks.posting_tasks import post_reel_to_tiktok
+from app.tasks.utils import run_async
+import structlog
+
+logger = structlog.get_logger()
+
+async def _download_reels(reel_ids: List[int]):
+    async with async_session_factory() as db:
+        return await reel_download_service.download_reels(db, reel_ids)
+
+async def _stalled_reel_ids():
+    async with async_session_factory() as db:
+        return await reel_download_service.stalled_reel_ids(db)
+
+# Worst case for one batch: every wave of transfers spends all of its attempts.
+# Leases are renewed meanwhile, so this only has to stop a batch that hangs.
+DOWNLOAD_BATCH_TIME_LIMIT = (
+    math.ceil(settings.DOWNLOAD_BATCH_SIZE / settings.DOWNLOAD_MAX_IN_FLIGHT)
+    * settings.DOWNLOAD_TIMEOUT_SECONDS
+    * settings.DOWNLOAD_MAX_ATTEMPTS
+    + 120
+)
+
+def enqueue_downloads(reel_ids: List[int]):
+    """Dispatch downloads in batches onto the downloads queue"""
+    batch_size = settings.DOWNLOAD_BATCH_SIZE
+    for start in range(0, len(reel_ids), batch_size):
+        download_reels.delay(reel_ids[start:start + batch_size])
+
+@celery_app.task(
+    bind=True,
+    name="app.tasks.download_tasks.download_reels",
+    time_limit=DOWNLOAD_BATCH_TIME_LIMIT,
+    soft_time_limit=DOWNLOAD_BATCH_TIME_LIMIT - 60
+)
+def download_reels(self, reel_ids: List[int]):
+    """Download a batch of pending reels and hand the ready ones to posting"""
+    logger.info("Downloading reel batch", reels=len(reel_ids))
+
+    try:
+        result = run_async(_download_reels(reel_ids))
+        for reel in interleave(result["downloaded"], key=lambda reel: reel["user_id"]):
+            post_reel_to_tiktok.delay(reel["reel_id"], reel["user_id"])
+        return {
+            "status": "success",
+            "downloaded": len(result["downloaded"]),
+            "retry": result["retry"],
+            "failed": result["failed"]
+        }
+
+    except Exception as e:
+        logger.error("Error downloading reel batch", reel_ids=reel_ids, error=str(e))
+        return {"status": "error", "message": str(e)}
+
+@celery_app.task(bind=True, name="app.tasks.download_tasks.retry_stalled_downloads")
+def retry_stalled_downloads(self):
+    """Re-dispatch pending reels whose download never finished"""
+    try:
+        reel_ids = run_async(_stalled_reel_ids())
+        enqueue_downloads(reel_ids)
+        if reel_ids:
+            logger.info("Stalled downloads re-dispatched", reels=len(reel_ids))
+        return {"status": "success", "reels_dispatched": len(reel_ids)}
+
+    except Exception as e:
+        logger.error("Error re-dispatching stalled downloads", error=str(e))
+        return {"status": "error", "message": str(e)}
@@ -1,5 +1,9 @@
 from celery import current_task
 from app.celery_app import celery_app
+from app.core.database import async_session_factory
+from app.services.storage_manager import storage_manager
+from app.services.tiktok_token_service import tiktok_token_service
+from app.tasks.utils import run_async
 import structlog
 import asyncio
 
@@ -19,7 +23,40 @@ def update_proxy_statistics(self):
 
 @celery_app.task(bind=True, name="app.tasks.maintenance_tasks.refresh_expired_tiktok_tokens")
 def refresh_expired_tiktok_tokens(self):
-    """Refresh expired TikTok tokens"""
-    logger.info("Refreshing expired TikTok tokens")
-    return {"status": "success"}
+    """Refresh every TikTok token expiring within the look-ahead window"""
+    logger.info("Refreshing expiring TikTok tokens")
+
+    try:
+        return run_async(tiktok_token_service.refresh_expiring())
+
+    except Exception as e:
+        logger.error("Error refreshing TikTok tokens", error=str(e))
+        return {"status": "error", "message": str(e)}
+
+@celery_app.task(bind=True, name="app.tasks.maintenance_tasks.refresh_tiktok_token")
+def refresh_tiktok_token(self, user_id: int):
+    """Refresh one user's TikTok token ahead of the next beat run"""
+    try:
+        refreshed = run_async(tiktok_token_service.refresh_user(user_id))
+        return {"status": "success", "user_id": user_id, "refreshed": refreshed}
+
+    except Exception as e:
+        logger.error("Error refreshing TikTok token", user_id=user_id, error=str(e))
+        return {"status": "error", "message": str(e)}
+
+
+async def _enforce_storage_budget():
+    async with async_session_factory() as db:
+        return await storage_manager.enforce_budget(db)
+
+@celery_app.task(bind=True, name="app.tasks.maintenance_tasks.enforce_storage_budget")
+def enforce_storage_budget(self):
+    """Evict local videos no pending reel needs once the disk budget is exceeded"""
+    logger.info("Enforcing storage budget")
+
+    try:
+        return run_async(_enforce_storage_budget())
 
+    except Exception as e:
+        logger.error("Error enforcing storage budget", error=str(e))
+        return {"status": "error", "message": str(e)}
@@ -1,44 +1,107 @@
+from typing import List
 from celery import current_task
 from app.celery_app import celery_app
+from app.core.config import settings
+from app.core.database import async_session_factory
+from app.models.monitored_profile import MonitoredProfile
+from app.services.fair_dispatch import interleave
+from app.services.scheduler_service import account_scheduler
+from app.services.monitoring_service import monitoring_service
+from app.tasks.download_tasks import enqueue_downloads
+from app.tasks.utils import run_async
 import structlog
-import random
 
 logger = structlog.get_logger()
 
+async def _claim_due_accounts():
+    async with async_session_factory() as db:
+        backfilled = await account_scheduler.link_profiles(db)
+        return backfilled, await account_scheduler.claim_due_accounts(db)
+
+async def _check_accounts(account_ids: List[int]):
+    async with async_session_factory() as db:
+        return await monitoring_service.check_accounts(db, account_ids)
+
+async def _check_profile(profile_id: int):
+    async with async_session_factory() as db:
+        profile = await db.get(MonitoredProfile, profile_id)
+        backfilled = []
+        if profile and profile.instagram_account_id is None:
+            backfilled = await account_scheduler.link_profiles(db)
+            await db.refresh(profile)
+        if not profile or not profile.instagram_account_id:
+            return {"status": "skipped", "new_reels": backfilled}
+        result = await monitoring_service.check_accounts(db, [profile.instagram_account_id])
+        return {**result, "new_reels": backfilled + result["new_reels"]}
+
+async def _probe_quarantined():
+    async with async_session_factory() as db:
+        return await monitoring_service.probe_quarantined(db)
+
+def _enqueue_new_reels(new_reels: list):
+    """Start downloads right away, only for the reels that were actually inserted
+
+    Reels are interleaved by tenant so no tenant's burst fills whole batches.
+    """
+    enqueue_downloads([reel["reel_id"] for reel in interleave(new_reels, key=lambda reel: reel["user_id"])])
+
 @celery_app.task(bind=True, name="app.tasks.monitoring_tasks.monitor_all_profiles")
 def monitor_all_profiles(self):
-    """Monitor all active Instagram profiles"""
-    logger.info("Starting profile monitoring")
-    
+    """Dispatch monitoring for every shared Instagram account that is due"""
+    logger.info("Starting profile monitoring sweep")
+
     try:
-        # Simulate monitoring process without database connections for now
-        # This avoids the asyncpg connection issues in Celery
-        profiles_count = random.randint(0, 5)
-        
-        logger.info("Profile monitoring completed", profiles_checked=profiles_count)
-        
-        # Simulate finding new reels
-        if profiles_count > 0:
-            new_reels = random.randint(0, 3)
-            if new_reels > 0:
-                logger.info("New reels detected", count=new_reels)
-        
-        return {"status": "success", "profiles_checked": profiles_count}
-        
+        backfilled, account_ids = run_async(_claim_due_accounts())
+        _enqueue_new_reels(backfilled)
+
+        # Fan out in bounded batches so a large sweep never floods the broker at once
+        batch_size = settings.MONITOR_FANOUT_BATCH_SIZE
+        for start in range(0, len(account_ids), batch_size):
+            monitor_accounts.delay(account_ids[start:start + batch_size])
+
+        logger.info("Profile monitoring sweep completed", accounts_dispatched=len(account_ids))
+        return {"status": "success", "accounts_dispatched": len(account_ids)}
+
     except Exception as e:
         logger.error("Error in profile monitoring", error=str(e))
         return {"status": "error", "message": str(e)}
 
+@celery_app.task(bind=True, name="app.tasks.monitoring_tasks.monitor_accounts")
+def monitor_accounts(self, account_ids: List[int]):
+    """Scrape a batch of shared accounts once and fan new reels out to subscribers"""
+    logger.info("Monitoring account batch", accounts=len(account_ids))
+
+    try:
+        result = run_async(_check_accounts(account_ids))
+        _enqueue_new_reels(result["new_reels"])
+        return {"status": "success", "accounts_checked": result["accounts_checked"], "new_reels": len(result["new_reels"])}
+
+    except Exception as e:
+        logger.error("Error monitoring account batch", account_ids=account_ids, error=str(e))
+        return {"status": "error", "message": str(e)}
+
 @celery_app.task(bind=True, name="app.tasks.monitoring_tasks.monitor_profile")
 def monitor_profile(self, profile_id: int):
-    """Monitor a specific profile"""
+    """Monitor a specific profile (checks its shared account right away)"""
     logger.info("Monitoring specific profile", profile_id=profile_id)
-    
+
     try:
-        # Simulate monitoring a specific profile
-        logger.info("Profile monitoring completed", profile_id=profile_id)
-        return {"status": "success", "profile_id": profile_id}
-        
+        result = run_async(_check_profile(profile_id))
+        _enqueue_new_reels(result["new_reels"])
+        return {"status": "success", "profile_id": profile_id, "new_reels": len(result["new_reels"])}
+
     except Exception as e:
         logger.error("Error monitoring profile", profile_id=profile_id, error=str(e))
-        return {"status": "error", "message": str(e)}
\ No newline at end of file
+        return {"status": "error", "message": str(e)}
+
+@celery_app.task(bind=True, name="app.tasks.monitoring_tasks.probe_quarantined_profiles")
+def probe_quarantined_profiles(self):
+    """Cheaply probe quarantined accounts and restore the reachable ones"""
+    logger.info("Probing quarantined accounts")
+
+    try:
+        return run_async(_probe_quarantined())
+
+    except Exception as e:
+        logger.error("Error probing quarantined accounts", error=str(e))
+        return {"status": "error", "message": str(e)}
@@ -1,14 +1,79 @@
+from typing import List, Optional
 from celery import current_task
 from app.celery_app import celery_app
+from app.core.database import async_session_factory
+from app.services.publishing_service import publishing_service
+from app.tasks.maintenance_tasks import refresh_tiktok_token
+from app.tasks.utils import run_async
 import structlog
 import asyncio
 
 logger = structlog.get_logger()
 
+async def _publish(reel_id: int, user_id: int):
+    async with async_session_factory() as db:
+        return await publishing_service.publish(db, reel_id, user_id)
+
+async def _publish_ready():
+    return await publishing_service.publish_ready()
+
+async def _requeue_dead_letter(reel_ids, user_id):
+    async with async_session_factory() as db:
+        return await publishing_service.requeue_dead_letter(db, reel_ids, user_id)
+
+async def _poll_publish_status():
+    async with async_session_factory() as db:
+        return await publishing_service.poll(db)
+
 @celery_app.task(bind=True, name="app.tasks.posting_tasks.post_reel_to_tiktok")
 def post_reel_to_tiktok(self, reel_id: str, user_id: int):
-    """Post a reel to TikTok"""
+    """Upload a downloaded reel to TikTok; the outcome is picked up by the poller"""
     logger.info("Posting reel to TikTok", reel_id=reel_id, user_id=user_id)
-    # Implementar lógica de postagem
-    return {"status": "success", "reel_id": reel_id}
 
+    try:
+        result = run_async(_publish(int(reel_id), user_id))
+        if result["status"] == "deferred":
+            refresh_tiktok_token.delay(user_id)
+        return result
+
+    except Exception as e:
+        logger.error("Error posting reel", reel_id=reel_id, error=str(e))
+        return {"status": "error", "message": str(e)}
+
+@celery_app.task(bind=True, name="app.tasks.posting_tasks.post_ready_reels")
+def post_ready_reels(self):
+    """Claim a batch of downloaded reels with SKIP LOCKED and publish them"""
+    try:
+        result = run_async(_publish_ready())
+        for user_id in result.get("stale_token_user_ids", []):
+            refresh_tiktok_token.delay(user_id)
+        return result
+
+    except Exception as e:
+        logger.error("Error posting ready reels", error=str(e))
+        return {"status": "error", "message": str(e)}
+
+@celery_app.task(bind=True, name="app.tasks.posting_tasks.poll_publish_status")
+def poll_publish_status(self):
+    """Check in-flight TikTok publishes in one batch and record their outcome"""
+    try:
+        return run_async(_poll_publish_status())
+
+    except Exception as e:
+        logger.error("Error polling publish status", error=str(e))
+        return {"status": "error", "message": str(e)}
+
+@celery_app.task(bind=True, name="app.tasks.posting_tasks.requeue_dead_letter_reels")
+def requeue_dead_letter_reels(self, reel_ids: Optional[List[int]] = None, user_id: Optional[int] = None):
+    """Move dead-lettered reels back to the start of the pipeline"""
+    # Imported here: download tasks hand their results to this module
+    from app.tasks.download_tasks import enqueue_downloads
+
+    try:
+        requeued = run_async(_requeue_dead_letter(reel_ids, user_id))
+        enqueue_downloads(requeued)
+        return {"status": "success", "requeued": len(requeued)}
+
+    except Exception as e:
+        logger.error("Error requeueing dead-letter reels", error=str(e))
+        return {"status": "error", "message": str(e)}
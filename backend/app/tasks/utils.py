@@ -0,0 +1,32 @@
+import asyncio
+from typing import Any, Coroutine
+from celery.signals import worker_process_init, worker_process_shutdown
+
+# One event loop per worker process. The async engine's connection pool is
+# bound to the loop it was first used on, so tasks must not create a fresh
+# loop (asyncio.run) on every call.
+_loop = None
+
+def run_async(coro: Coroutine) -> Any:
+    """Run a coroutine to completion on the worker's persistent event loop"""
+    global _loop
+    
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_loop)
+    
+    return _loop.run_until_complete(coro)
+
+@worker_process_init.connect
+def open_http_clients(**kwargs):
+    """Open pooled HTTP clients on the worker's loop once per process"""
+    from app.services.tiktok_service import tiktok_service
+    run_async(tiktok_service.start())
+
+@worker_process_shutdown.connect
+def close_http_clients(**kwargs):
+    """Close pooled HTTP clients before the worker process exits"""
+    from app.services.download_service import video_downloader
+    from app.services.tiktok_service import tiktok_service
+    run_async(tiktok_service.close())
+    run_async(video_downloader.close())
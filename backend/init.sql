@@ -19,23 +19,43 @@ CREATE TABLE tiktok_credentials (
     access_token TEXT NOT NULL,
     refresh_token TEXT NOT NULL,
     expires_in INTEGER NOT NULL,
+    expires_at TIMESTAMPTZ,
     open_id VARCHAR(255) UNIQUE NOT NULL,
     scope VARCHAR(500),
     created_at TIMESTAMPTZ DEFAULT NOW(),
     updated_at TIMESTAMPTZ DEFAULT NOW()
 );
 
+-- Create Instagram accounts table (scraped once, shared by all subscribers)
+CREATE TABLE instagram_accounts (
+    id SERIAL PRIMARY KEY,
+    username VARCHAR(255) UNIQUE NOT NULL,
+    instagram_user_id VARCHAR(32),
+    last_checked_at TIMESTAMPTZ,
+    next_check_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    effective_interval_minutes INTEGER,
+    last_seen_reel_code VARCHAR(50),
+    last_seen_taken_at TIMESTAMPTZ,
+    consecutive_failures INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    quarantined_at TIMESTAMPTZ,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
 -- Create monitored profiles table
 CREATE TABLE monitored_profiles (
     id SERIAL PRIMARY KEY,
     user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
     instagram_username VARCHAR(255) NOT NULL,
+    instagram_account_id INTEGER REFERENCES instagram_accounts(id) ON DELETE SET NULL,
     display_name VARCHAR(255),
     profile_picture_url TEXT,
     is_active BOOLEAN DEFAULT TRUE,
     last_checked_at TIMESTAMPTZ,
     last_posted_at TIMESTAMPTZ,
     check_interval_minutes INTEGER DEFAULT 60,
+    adaptive_polling BOOLEAN DEFAULT FALSE,
     created_at TIMESTAMPTZ DEFAULT NOW(),
     updated_at TIMESTAMPTZ DEFAULT NOW(),
     UNIQUE(user_id, instagram_username)
@@ -45,18 +65,50 @@ CREATE TABLE monitored_profiles (
 CREATE TABLE posted_reels (
     id SERIAL PRIMARY KEY,
     profile_id INTEGER NOT NULL REFERENCES monitored_profiles(id) ON DELETE CASCADE,
-    instagram_reel_code VARCHAR(50) NOT NULL UNIQUE,
+    instagram_reel_code VARCHAR(50) NOT NULL,
     instagram_reel_url TEXT,
+    instagram_video_url TEXT,
     tiktok_post_id VARCHAR(255),
     tiktok_post_url TEXT,
+    claimed_at TIMESTAMPTZ,
+    lease_expires_at TIMESTAMPTZ,
+    attempt_count INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at TIMESTAMPTZ,
+    publish_id VARCHAR(255),
+    publish_checks INTEGER NOT NULL DEFAULT 0,
+    next_publish_check_at TIMESTAMPTZ,
     status VARCHAR(50) NOT NULL DEFAULT 'pending',
     error_message TEXT,
     video_file_path TEXT,
+    video_sha256 VARCHAR(64),
+    video_size_bytes BIGINT,
+    video_duration_seconds DOUBLE PRECISION,
+    video_width INTEGER,
+    video_height INTEGER,
+    video_codec VARCHAR(16),
+    video_moov_offset BIGINT,
     caption TEXT,
     hashtags TEXT[],
     posted_at TIMESTAMPTZ,
     created_at TIMESTAMPTZ DEFAULT NOW(),
-    updated_at TIMESTAMPTZ DEFAULT NOW()
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    UNIQUE(profile_id, instagram_reel_code)
+);
+
+-- Create publish attempts table (idempotency and audit of TikTok publishes)
+CREATE TABLE publish_attempts (
+    id SERIAL PRIMARY KEY,
+    reel_id INTEGER NOT NULL REFERENCES posted_reels(id) ON DELETE CASCADE,
+    instagram_reel_code VARCHAR(50) NOT NULL,
+    open_id VARCHAR(255) NOT NULL,
+    attempt INTEGER NOT NULL,
+    outcome VARCHAR(20) NOT NULL DEFAULT 'started',
+    error_class VARCHAR(20),
+    error_message TEXT,
+    publish_id VARCHAR(255),
+    started_at TIMESTAMPTZ DEFAULT NOW(),
+    heartbeat_at TIMESTAMPTZ DEFAULT NOW(),
+    finished_at TIMESTAMPTZ
 );
 
 -- Create application logs table
@@ -95,12 +147,25 @@ CREATE TABLE proxy_configurations (
 CREATE INDEX idx_users_email ON users(email);
 CREATE INDEX idx_users_active ON users(is_active);
 CREATE INDEX idx_tiktok_credentials_user_id ON tiktok_credentials(user_id);
+CREATE INDEX idx_tiktok_credentials_expires_at ON tiktok_credentials(expires_at);
 CREATE INDEX idx_monitored_profiles_user_id ON monitored_profiles(user_id);
 CREATE INDEX idx_monitored_profiles_active ON monitored_profiles(is_active);
 CREATE INDEX idx_monitored_profiles_last_checked ON monitored_profiles(last_checked_at);
+CREATE INDEX idx_monitored_profiles_account ON monitored_profiles(instagram_account_id, is_active);
+CREATE INDEX idx_instagram_accounts_due ON instagram_accounts(next_check_at) WHERE quarantined_at IS NULL;
+CREATE INDEX idx_instagram_accounts_quarantined ON instagram_accounts(next_check_at) WHERE quarantined_at IS NOT NULL;
 CREATE INDEX idx_posted_reels_profile_id ON posted_reels(profile_id);
 CREATE INDEX idx_posted_reels_status ON posted_reels(status);
 CREATE INDEX idx_posted_reels_instagram_code ON posted_reels(instagram_reel_code);
+CREATE INDEX idx_posted_reels_video_sha256 ON posted_reels(video_sha256);
+CREATE INDEX idx_posted_reels_pending_queue ON posted_reels(created_at) WHERE status = 'pending';
+CREATE INDEX idx_posted_reels_downloaded_queue ON posted_reels(created_at) WHERE status = 'downloaded';
+CREATE INDEX idx_posted_reels_profile_queue ON posted_reels(profile_id, created_at) WHERE status IN ('pending', 'downloaded');
+CREATE INDEX idx_posted_reels_leases ON posted_reels(lease_expires_at) WHERE lease_expires_at IS NOT NULL;
+CREATE INDEX idx_posted_reels_publishing ON posted_reels(next_publish_check_at) WHERE status = 'publishing';
+CREATE UNIQUE INDEX idx_publish_attempts_key ON publish_attempts(instagram_reel_code, open_id) WHERE outcome IN ('started', 'succeeded');
+CREATE INDEX idx_publish_attempts_reel_id ON publish_attempts(reel_id);
+CREATE INDEX idx_publish_attempts_publish_id ON publish_attempts(publish_id);
 CREATE INDEX idx_application_logs_user_id ON application_logs(user_id);
 CREATE INDEX idx_application_logs_timestamp ON application_logs(timestamp);
 CREATE INDEX idx_application_logs_level ON application_logs(level);
@@ -124,6 +189,9 @@ CREATE TRIGGER update_users_updated_at BEFORE UPDATE ON users
 CREATE TRIGGER update_tiktok_credentials_updated_at BEFORE UPDATE ON tiktok_credentials
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
+CREATE TRIGGER update_instagram_accounts_updated_at BEFORE UPDATE ON instagram_accounts
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
 CREATE TRIGGER update_monitored_profiles_updated_at BEFORE UPDATE ON monitored_profiles
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 